@@ -5,22 +5,607 @@ This module provides persistent caching for job information, scripts, and output
 to preserve data even when jobs are no longer queryable from Slurm.
 """
 
+import base64
+import copy
+import functools
+import gzip
 import hashlib
 import json
+import os
+import re
 import sqlite3
 import threading
+import time
+import zoneinfo
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from dataclasses import asdict, dataclass, fields
-from datetime import datetime, timedelta
+from dataclasses import MISSING, dataclass, fields
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 from .models.job import JobInfo, JobState
 from .utils.logging import setup_logger
 
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    # zstd is optional; outputs fall back to gzip when it is not installed
+    zstandard = None
+
 logger = setup_logger(__name__)
 
+# gzip.compress defaults to level 9, which costs several times the CPU of
+# level 3 on log output for only a few percent smaller blobs
+_GZIP_FALLBACK_LEVEL = 3
+
+# Rows fetched per round-trip when streaming large result sets; each batch is
+# decoded on a worker thread while SQLite steps through the next one.
+_FETCH_BATCH_SIZE = 500
+
+# Per-connection settings; journal_mode=WAL is persistent and set at init.
+_CONNECTION_PRAGMAS = (
+    # Set busy timeout to 10 seconds
+    "PRAGMA busy_timeout=10000",
+    # synchronous=NORMAL skips the per-commit fsync and is still safe with WAL
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    # Serve reads from the OS page cache (1 GiB) and keep 64 MiB of pages hot.
+    # Windows can't truncate a mapped file, which breaks the WAL checkpoint
+    # and incremental vacuum, so memory-mapped I/O stays off there.
+    *(() if os.name == "nt" else ("PRAGMA mmap_size=1073741824",)),
+    "PRAGMA cache_size=-65536",
+    # Bound the rows ANALYZE / PRAGMA optimize sample per index
+    "PRAGMA analysis_limit=400",
+)
+
+# Stored in PRAGMA user_version once _migrate_schema has run. Bump it whenever
+# _migrate_schema gains a step so existing databases run it again.
+_SCHEMA_VERSION = 10
+
+# cleanup_by_size evicts script-less rows oldest-first in batches of this
+# many, for at most this many batches per call
+_SIZE_CLEANUP_BATCH_SIZE = 500
+_SIZE_CLEANUP_MAX_BATCHES = 50
+
+# How often a long-running process refreshes planner statistics
+_OPTIMIZE_INTERVAL_SECONDS = 4 * 60 * 60
+
+# Compiled statements kept per connection. SQL is only ever built from fixed
+# fragments (never by interpolating values), so each query shape compiles once
+# per connection; the default of 128 is too small for the number of distinct
+# statements the cache and its callers issue.
+_STATEMENT_CACHE_SIZE = 256
+
+# UPDATE ... RETURNING needs SQLite 3.35; older builds (e.g. RHEL 9's 3.34)
+# look the range up first and count the hit separately.
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Array template rows ("123_[0-99]") are told apart from tasks by job_id.
+# This is the predicate of idx_cached_jobs_array_task_ids, so task queries
+# must repeat it verbatim for the planner to pick that partial index.
+_ARRAY_TASK_CLAUSE = "instr(job_id, '[') = 0"
+
+# A range entry covers a request when its window contains the requested one
+# and it has not expired. cache_key is the primary key, so this is one probe.
+_RANGE_CACHE_MATCH = """
+    WHERE cache_key = ? AND hostname = ?
+      AND start_date <= ? AND end_date >= ?
+      AND expires_at > ?
+"""
+
+_RANGE_CACHE_HIT_SQL = (
+    "UPDATE cached_job_ranges SET hit_count = hit_count + 1"
+    + _RANGE_CACHE_MATCH
+    + "RETURNING job_ids_json, hit_count"
+)
+
+_RANGE_CACHE_LOOKUP_SQL = (
+    "SELECT job_ids_json, hit_count + 1 AS hit_count FROM cached_job_ranges"
+    + _RANGE_CACHE_MATCH
+)
+
+# strftime() pattern matching datetime() output, the format of submit_time
+_SUBMIT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Recycled-ID guard. submit_time holds datetime() output (UTC), so the cutoff
+# compares as text; unparseable submit times are NULL and always kept.
+_SUBMIT_TIME_FRESH_CLAUSE = " AND (submit_time IS NULL OR submit_time >= ?)"
+
+# Insert for one cached_jobs row; see JobDataCache._cached_job_params.
+_INSERT_CACHED_JOB_SQL = """
+    INSERT INTO cached_jobs
+    (job_id, hostname, job_info_json, script_content, local_source_dir,
+     stdout_compressed, stdout_size, stdout_compression,
+     stderr_compressed, stderr_size, stderr_compression,
+     cached_at, last_updated, is_active, array_job_id,
+     state, user, partition, submit_time, runtime)
+    VALUES (:job_id, :hostname, :job_info_json, :script_content,
+            :local_source_dir, :stdout_compressed, :stdout_size,
+            :stdout_compression, :stderr_compressed, :stderr_size,
+            :stderr_compression, :cached_at, :last_updated, :is_active,
+            :array_job_id, :state, :user, :partition,
+            datetime(:submit_time), :runtime)
+"""
+
+_UPSERT_CACHED_JOB_SQL = (
+    _INSERT_CACHED_JOB_SQL
+    + """
+    ON CONFLICT(job_id, hostname) DO UPDATE SET
+        job_info_json = excluded.job_info_json,
+        script_content = CASE WHEN :preserve
+            THEN COALESCE(excluded.script_content, script_content)
+            ELSE excluded.script_content END,
+        local_source_dir = CASE WHEN :preserve
+            THEN COALESCE(excluded.local_source_dir, local_source_dir)
+            ELSE excluded.local_source_dir END,
+        stdout_compressed = CASE WHEN :preserve
+            THEN stdout_compressed ELSE excluded.stdout_compressed END,
+        stdout_size = CASE WHEN :preserve
+            THEN stdout_size ELSE excluded.stdout_size END,
+        stdout_compression = CASE WHEN :preserve
+            THEN stdout_compression ELSE excluded.stdout_compression END,
+        stderr_compressed = CASE WHEN :preserve
+            THEN stderr_compressed ELSE excluded.stderr_compressed END,
+        stderr_size = CASE WHEN :preserve
+            THEN stderr_size ELSE excluded.stderr_size END,
+        stderr_compression = CASE WHEN :preserve
+            THEN stderr_compression ELSE excluded.stderr_compression END,
+        stdout_fetched_after_completion = CASE WHEN :preserve
+            THEN stdout_fetched_after_completion ELSE 0 END,
+        stderr_fetched_after_completion = CASE WHEN :preserve
+            THEN stderr_fetched_after_completion ELSE 0 END,
+        cached_at = CASE WHEN :preserve
+            THEN cached_at ELSE excluded.cached_at END,
+        last_updated = excluded.last_updated,
+        is_active = excluded.is_active,
+        array_job_id = excluded.array_job_id,
+        state = excluded.state,
+        user = excluded.user,
+        partition = excluded.partition,
+        submit_time = excluded.submit_time,
+        runtime = excluded.runtime
+"""
+)
+
+# Set a job's script, inserting a placeholder row if the job is not cached yet
+_UPSERT_JOB_SCRIPT_SQL = (
+    _INSERT_CACHED_JOB_SQL
+    + """
+    ON CONFLICT(job_id, hostname) DO UPDATE SET
+        script_content = excluded.script_content,
+        last_updated = excluded.last_updated
+"""
+)
+
+# Create or refresh an array_jobs row, taking its task count from the
+# trigger-maintained state counts. An empty script keeps the one already stored.
+_UPSERT_ARRAY_JOB_SQL = """
+    INSERT INTO array_jobs
+    (array_job_id, hostname, job_name, user, script_content,
+     total_tasks, submit_time, partition, account, work_dir,
+     created_at, last_updated)
+    VALUES (
+        :array_job_id, :hostname, :job_name, :user, :script_content,
+        (
+            SELECT COALESCE(SUM(count), 0) FROM array_task_stats
+            WHERE array_job_id = :array_job_id AND hostname = :hostname
+        ),
+        :submit_time, :partition, :account, :work_dir, :now, :now
+    )
+    ON CONFLICT(array_job_id, hostname) DO UPDATE SET
+        job_name = excluded.job_name,
+        user = excluded.user,
+        script_content = COALESCE(
+            NULLIF(excluded.script_content, ''), array_jobs.script_content
+        ),
+        total_tasks = excluded.total_tasks,
+        submit_time = excluded.submit_time,
+        partition = excluded.partition,
+        account = excluded.account,
+        work_dir = excluded.work_dir,
+        last_updated = excluded.last_updated
+"""
+
+# array_task_stats is kept current by triggers on cached_jobs: each task row
+# adds one to the count for its state and removes one from the state it
+# leaves, so refreshing a task never re-aggregates the whole array.
+_ARRAY_TASK_STATS_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+_ARRAY_TASK_STATS_INC_SQL = f"""
+    INSERT INTO array_task_stats
+    (array_job_id, hostname, state, count, last_updated)
+    SELECT NEW.array_job_id, NEW.hostname, NEW.state, 1, {_ARRAY_TASK_STATS_NOW}
+    WHERE NEW.array_job_id IS NOT NULL AND NEW.state IS NOT NULL
+      AND instr(NEW.job_id, '[') = 0
+    ON CONFLICT(array_job_id, hostname, state) DO UPDATE SET
+        count = count + 1,
+        last_updated = excluded.last_updated;
+"""
+
+_ARRAY_TASK_STATS_DEC_SQL = f"""
+    UPDATE array_task_stats
+    SET count = count - 1, last_updated = {_ARRAY_TASK_STATS_NOW}
+    WHERE array_job_id = OLD.array_job_id AND hostname = OLD.hostname
+      AND state = OLD.state AND instr(OLD.job_id, '[') = 0;
+    DELETE FROM array_task_stats
+    WHERE array_job_id = OLD.array_job_id AND hostname = OLD.hostname
+      AND state = OLD.state AND count <= 0;
+"""
+
+_ARRAY_TASK_STATS_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_array_task_stats_insert
+    AFTER INSERT ON cached_jobs
+    BEGIN {_ARRAY_TASK_STATS_INC_SQL} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_array_task_stats_update
+    AFTER UPDATE OF job_id, hostname, array_job_id, state ON cached_jobs
+    WHEN OLD.job_id IS NOT NEW.job_id
+      OR OLD.hostname IS NOT NEW.hostname
+      OR OLD.array_job_id IS NOT NEW.array_job_id
+      OR OLD.state IS NOT NEW.state
+    BEGIN {_ARRAY_TASK_STATS_DEC_SQL} {_ARRAY_TASK_STATS_INC_SQL} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_array_task_stats_delete
+    AFTER DELETE ON cached_jobs
+    BEGIN {_ARRAY_TASK_STATS_DEC_SQL} END
+    """,
+)
+
+# Per-thread memo of get_cached_job results, kept without the output blobs.
+# The memo is cleared on any database change; the TTL bounds drift of the
+# time-based age cutoffs.
+_ROW_MEMO_SIZE = 1024
+_ROW_MEMO_TTL = 60.0
+
+# Reverse lookup for cached state values; unknown values map to UNKNOWN
+# without raising.
+_JOB_STATES = {state.value: state for state in JobState}
+
+# States whose cache rows are flagged is_active
+_ACTIVE_JOB_STATES = frozenset({JobState.PENDING, JobState.RUNNING})
+
+_JOB_INFO_FIELDS = tuple(field.name for field in fields(JobInfo))
+_JOB_INFO_FIELD_NAMES = frozenset(_JOB_INFO_FIELDS)
+_JOB_INFO_DEFAULTS = {
+    field.name: field.default
+    for field in fields(JobInfo)
+    if field.default is not MISSING
+}
+_JOB_INFO_REQUIRED_FIELDS = _JOB_INFO_FIELD_NAMES - _JOB_INFO_DEFAULTS.keys()
+
+# Fields an update must not blank out; any empty value keeps the old one
+_CRITICAL_JOB_INFO_FIELDS = frozenset(
+    {
+        "stdout_file",
+        "stderr_file",
+        "work_dir",
+        "submit_line",
+        "req_tres",
+        "alloc_tres",
+        "node_list",
+    }
+)
+
+_decode_executor: Optional[ThreadPoolExecutor] = None
+_decode_executor_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=64)
+def _tz(name: str) -> zoneinfo.ZoneInfo:
+    """Get a cluster timezone, loading tzdata at most once per name."""
+    return zoneinfo.ZoneInfo(name)
+
+
+_SINCE_RE = re.compile(r"^(\d+)([hdwm])$")
+
+_SINCE_UNITS = {
+    "h": timedelta(hours=1),
+    "d": timedelta(days=1),
+    "w": timedelta(weeks=1),
+    "m": timedelta(days=30),
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _since_to_timedelta(since: str) -> timedelta:
+    """Convert a 'since' value like '12h' or '2w' to a window; default 1 day."""
+    match = _SINCE_RE.match(since)
+    if not match:
+        return timedelta(days=1)
+    return int(match.group(1)) * _SINCE_UNITS[match.group(2)]
+
+
+def _json_default(value: Any) -> Any:
+    """Encode the non-JSON types that appear on cached models."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# json.dumps() builds a new encoder on every call once default= is passed;
+# the stdlib fallback reuses this one instead.
+_JOB_INFO_ENCODER = json.JSONEncoder(default=_json_default)
+
+
+def _dump_job_info(job_info: JobInfo) -> str:
+    """Serialize a JobInfo for the job_info_json column in a single pass."""
+    if orjson is not None:
+        # orjson encodes dataclasses directly; decode since SQLite's JSON
+        # functions only accept TEXT
+        return orjson.dumps(job_info, default=_json_default).decode()
+    return _JOB_INFO_ENCODER.encode(vars(job_info))
+
+
+def _loads_json(payload: Union[str, bytes]) -> Any:
+    """Decode a JSON column value, with orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _dumps_json(value: Any) -> str:
+    """Encode a plain JSON column value, with orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+def _dump_export_row(row: Dict[str, Any]) -> bytes:
+    """Serialize one exported cached_jobs row; non-JSON values use str()."""
+    if orjson is not None:
+        return orjson.dumps(row, default=str, option=orjson.OPT_INDENT_2)
+    return json.dumps(row, indent=2, default=str).encode()
+
+
+def _pad_chunk(chunk: List[Any], filler: Any = None) -> List[Any]:
+    """Pad a lookup chunk to the next power of two with never-matching NULLs.
+
+    Batched IN/VALUES lookups otherwise produce a different statement for
+    every chunk length, each compiled once and then evicted from the
+    statement cache; padding bounds them to a few shapes per query.
+    """
+    size = 1 << (len(chunk) - 1).bit_length()
+    return chunk + [filler] * (size - len(chunk))
+
+
+@functools.lru_cache(maxsize=32)
+def _in_placeholders(size: int) -> str:
+    """Return the "?,?,..." list for an IN clause of the given (padded) size."""
+    return ",".join(["?"] * size)
+
+
+@functools.lru_cache(maxsize=32)
+def _values_placeholders(size: int) -> str:
+    """Return the "(?, ?), ..." rows for a VALUES table of key pairs."""
+    return ", ".join(["(?, ?)"] * size)
+
+
+# The cached_jobs columns _row_to_cached_data unpacks, in order. Queries
+# feeding it select exactly these so rows can be read positionally.
+_CACHED_JOB_COLUMN_NAMES = (
+    "job_id",
+    "hostname",
+    "job_info_json",
+    "script_content",
+    "local_source_dir",
+    "stdout_compressed",
+    "stdout_size",
+    "stdout_compression",
+    "stderr_compressed",
+    "stderr_size",
+    "stderr_compression",
+    "cached_at",
+    "last_updated",
+    "is_active",
+)
+_CACHED_JOB_COLUMNS = ", ".join(_CACHED_JOB_COLUMN_NAMES)
+_KEYED_CACHED_JOB_COLUMNS = ", ".join(f"c.{name}" for name in _CACHED_JOB_COLUMN_NAMES)
+
+# Same columns with the output blobs replaced by NULL, for listings that
+# never look at them
+_SLIM_CACHED_JOB_COLUMNS = ", ".join(
+    f"NULL AS {name}" if name.endswith("_compressed") else name
+    for name in _CACHED_JOB_COLUMN_NAMES
+)
+
+# Columns returned by the device and subscription listings, in the order the
+# result dicts are zipped from
+_NOTIFICATION_DEVICE_COLUMN_NAMES = (
+    "api_key_hash",
+    "device_token",
+    "platform",
+    "token_type",
+    "client_type",
+    "payload_format",
+    "bundle_id",
+    "environment",
+    "device_id",
+    "enabled",
+    "created_at",
+    "last_seen",
+)
+_NOTIFICATION_DEVICE_COLUMNS = ", ".join(_NOTIFICATION_DEVICE_COLUMN_NAMES)
+_WEBPUSH_SUBSCRIPTION_COLUMN_NAMES = (
+    "api_key_hash",
+    "endpoint",
+    "p256dh",
+    "auth",
+    "user_agent",
+    "enabled",
+    "created_at",
+    "last_seen",
+)
+_WEBPUSH_SUBSCRIPTION_COLUMNS = ", ".join(_WEBPUSH_SUBSCRIPTION_COLUMN_NAMES)
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_jobs_query(
+    by_hostname: bool,
+    active_only: bool,
+    by_user: bool,
+    by_since: bool,
+    with_outputs: bool = True,
+    after_key: bool = False,
+) -> str:
+    """Build the get_cached_jobs SQL for one filter combination.
+
+    Rows end with an extra rowid column, the tie-breaker of the
+    (last_updated, rowid) key. With ``after_key`` only rows past a given key
+    are returned. Parameters bind in the order hostname, user, since,
+    last_updated and rowid of the key, limit.
+    """
+    clauses = []
+    if by_hostname:
+        clauses.append("hostname = ?")
+    if active_only:
+        clauses.append("is_active = 1")
+    if by_user:
+        clauses.append("user = ?")
+    if by_since:
+        # submit_time is stored normalized to UTC by datetime(), so it
+        # compares as text and can use idx_cached_jobs_submit
+        clauses.append("submit_time > datetime(?)")
+    if after_key:
+        clauses.append("(last_updated, rowid) < (?, ?)")
+
+    columns = _CACHED_JOB_COLUMNS if with_outputs else _SLIM_CACHED_JOB_COLUMNS
+    query = f"SELECT {columns}, rowid FROM cached_jobs"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    # Always bind LIMIT (-1 means no limit) so the limited and unlimited
+    # variants share one cached statement
+    return query + " ORDER BY last_updated DESC, rowid DESC LIMIT ?"
+
+
+def _cached_jobs_params(
+    hostname: Optional[str], user: Optional[str], since: Optional[datetime]
+) -> List[Any]:
+    """Bind the filter parameters of _cached_jobs_query, ahead of the key/limit."""
+    params: List[Any] = []
+    if hostname:
+        params.append(hostname)
+    if user:
+        params.append(user)
+    if since:
+        # Strip timezone for comparison with stored times (which have no timezone)
+        since_for_comparison = since.replace(tzinfo=None) if since.tzinfo else since
+        params.append(since_for_comparison.isoformat())
+    return params
+
+
+def _construct_job_info(values: Dict[str, Any]) -> JobInfo:
+    """Build a JobInfo from already-normalized cache values without __init__."""
+    job_info = object.__new__(JobInfo)
+    job_info.__dict__.update(_JOB_INFO_DEFAULTS)
+    job_info.__dict__.update(values)
+    return job_info
+
+
+def _get_decode_executor() -> ThreadPoolExecutor:
+    """Get the shared executor used to decode cached job payloads."""
+    global _decode_executor
+
+    if _decode_executor is None:
+        with _decode_executor_lock:
+            if _decode_executor is None:
+                _decode_executor = ThreadPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    thread_name_prefix="ssync-cache-decode",
+                )
+    return _decode_executor
+
+
+def _decode_job_info_batch(payloads: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Decode a batch of job_info_json payloads, using None for corrupt rows.
+
+    The batch is parsed as one JSON array, paying the parser's per-call cost
+    once; if any row is corrupt it is decoded row by row instead.
+    """
+    try:
+        decoded = _loads_json("[" + ",".join(payloads) + "]")
+    except (ValueError, TypeError):
+        pass
+    else:
+        # A corrupt row could still split into several values
+        if len(decoded) == len(payloads) and all(
+            isinstance(doc, dict) for doc in decoded
+        ):
+            return decoded
+
+    decoded = []
+    for payload in payloads:
+        try:
+            decoded.append(_loads_json(payload))
+        except Exception as e:
+            logger.warning(f"Failed to parse cached job: {e}")
+            decoded.append(None)
+    return decoded
+
+
+def compress_output(data: bytes) -> Tuple[bytes, str]:
+    """Compress job output with the best available codec.
+
+    Returns the compressed bytes and the codec label stored next to them.
+    """
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data), "zstd"
+    return gzip.compress(data, compresslevel=_GZIP_FALLBACK_LEVEL), "gzip"
+
+
+def decompress_output(data: bytes, compression: str) -> bytes:
+    """Decompress job output stored with the given codec label."""
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd-compressed output requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def _encode_output(
+    content: Optional[Union[str, bytes]],
+) -> Optional[Tuple[bytes, int, str]]:
+    """Prepare job output for storage, compressing it when it is large enough."""
+    if content is None:
+        return None
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    # Sizes are always the uncompressed byte length, whatever type came in
+    if len(data) > 1024:
+        compressed, compression = compress_output(data)
+        return compressed, len(data), compression
+    # Store uncompressed for small content
+    return data, len(data), "none"
+
+
+def _decode_output_payload(
+    payload: Optional[Dict[str, Any]],
+) -> Optional[Tuple[bytes, int, str]]:
+    """Unpack a base64 output payload from update_job_outputs_compressed."""
+    if payload is None:
+        return None
+    data = base64.b64decode(payload["data"])
+    # Compress payloads that arrive uncompressed and are large enough
+    if not payload.get("compressed") and len(data) > 1024:
+        data, compression = compress_output(data)
+    else:
+        compression = payload.get("compression", "none")
+    return data, payload.get("original_size", 0), compression
+
 
 @dataclass
 class CachedJobData:
@@ -33,7 +618,7 @@ class CachedJobData:
     # Compressed output storage
     stdout_compressed: Optional[bytes] = None
     stdout_size: int = 0
-    stdout_compression: str = "none"  # 'gzip' or 'none'
+    stdout_compression: str = "none"  # 'zstd', 'gzip' or 'none'
     stderr_compressed: Optional[bytes] = None
     stderr_size: int = 0
     stderr_compression: str = "none"
@@ -49,6 +634,27 @@ class CachedJobData:
             self.last_updated = datetime.now()
 
 
+def _strip_output_blobs(
+    cached_data: Optional[CachedJobData],
+) -> Optional[CachedJobData]:
+    """Copy an entry for the row memo without its compressed output blobs."""
+    if cached_data is None:
+        return None
+    stripped = copy.copy(cached_data)
+    stripped.stdout_compressed = None
+    stripped.stderr_compressed = None
+    return stripped
+
+
+def _copy_cached_data(cached_data: Optional[CachedJobData]) -> Optional[CachedJobData]:
+    """Copy a memoized entry so callers can't mutate the shared instance."""
+    if cached_data is None:
+        return None
+    cached_copy = copy.copy(cached_data)
+    cached_copy.job_info = copy.copy(cached_data.job_info)
+    return cached_copy
+
+
 @dataclass
 class NotificationDevice:
     api_key_hash: str
@@ -102,460 +708,695 @@ class JobDataCache:
 
         self.db_path = self.cache_dir / "jobs.db"
         self.max_age_days = max_age_days
-        self._lock = threading.RLock()
+        # One connection per thread, opened lazily and reused across calls
+        self._local = threading.local()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        self._generation = 0
+        self._optimize_timer: Optional[threading.Timer] = None
         self._init_database()
+        self._schedule_optimize()
 
         logger.info(f"Initialized job cache at {self.cache_dir}")
 
-    def _prepare_dict_for_json(self, data: Dict) -> Dict:
-        """Recursively prepare dictionary for JSON serialization by converting enums."""
-        result = {}
-        for key, value in data.items():
-            if isinstance(value, Enum):
-                result[key] = value.value
-            elif isinstance(value, dict):
-                result[key] = self._prepare_dict_for_json(value)
-            elif isinstance(value, list):
-                result[key] = [
-                    self._prepare_dict_for_json(item)
-                    if isinstance(item, dict)
-                    else (item.value if isinstance(item, Enum) else item)
-                    for item in value
-                ]
-            else:
-                result[key] = value
-        return result
-
     def _init_database(self):
         """Initialize SQLite database with required tables."""
         with self._get_connection() as conn:
-            # Enable WAL mode for better concurrency (allows multiple readers + 1 writer)
+            # page_size and auto_vacuum only take effect before the first table
+            # is created, so they are applied to brand-new databases only.
+            # Larger pages suit the blob-heavy rows; incremental auto_vacuum
+            # lets cleanups hand freed pages back to the filesystem.
+            if conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is None:
+                conn.execute("PRAGMA page_size=8192")
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
+            # Enable WAL mode for better concurrency (allows multiple readers + 1 writer).
+            # The journal mode is persistent, so it only needs to be set once here.
             conn.execute("PRAGMA journal_mode=WAL")
-            # Set busy timeout to 10 seconds
-            conn.execute("PRAGMA busy_timeout=10000")
-            # Enable synchronous=NORMAL for better performance (still safe with WAL)
-            conn.execute("PRAGMA synchronous=NORMAL")
 
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS cached_jobs (
-                    job_id TEXT,
-                    hostname TEXT,
-                    job_info_json TEXT NOT NULL,
-                    script_content TEXT,
-                    -- Compressed output storage
-                    stdout_compressed BLOB,
-                    stdout_size INTEGER DEFAULT 0,
-                    stdout_compression TEXT DEFAULT 'none',
-                    stderr_compressed BLOB,
-                    stderr_size INTEGER DEFAULT 0,
-                    stderr_compression TEXT DEFAULT 'none',
-                    cached_at TEXT NOT NULL,
-                    last_updated TEXT NOT NULL,
-                    is_active BOOLEAN NOT NULL DEFAULT 1,
-                    stdout_fetched_after_completion BOOLEAN DEFAULT 0,
-                    stderr_fetched_after_completion BOOLEAN DEFAULT 0,
-                    PRIMARY KEY (job_id, hostname)
-                )
-            """)
+            # Schema creation and migrations run once per schema version
+            # rather than on every start.
+            if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                conn.execute("BEGIN IMMEDIATE")
+                # Another process may have migrated while we waited for the lock
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < _SCHEMA_VERSION:
+                    self._migrate_schema(conn)
+                    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                conn.commit()
 
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS run_manifests (
-                    job_id TEXT NOT NULL,
-                    hostname TEXT NOT NULL,
-                    manifest_version INTEGER NOT NULL DEFAULT 1,
-                    manifest_json TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    PRIMARY KEY (job_id, hostname)
-                )
-            """)
+            self._analyze_if_stale(conn)
 
-            # Add columns if they don't exist (for migration)
-            try:
-                conn.execute(
-                    "ALTER TABLE cached_jobs ADD COLUMN stdout_fetched_after_completion BOOLEAN DEFAULT 0"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE cached_jobs ADD COLUMN stderr_fetched_after_completion BOOLEAN DEFAULT 0"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute("ALTER TABLE cached_jobs ADD COLUMN local_source_dir TEXT")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS cached_job_ranges (
-                    cache_key TEXT PRIMARY KEY,
-                    hostname TEXT NOT NULL,
-                    start_date TEXT NOT NULL,
-                    end_date TEXT NOT NULL,
-                    filters_json TEXT NOT NULL,
-                    job_ids_json TEXT NOT NULL,
-                    cached_at TEXT NOT NULL,
-                    expires_at TEXT NOT NULL,
-                    hit_count INTEGER DEFAULT 0
-                )
-            """)
+            conn.commit()
 
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS host_fetch_state (
-                    hostname TEXT PRIMARY KEY,
-                    last_fetch_time TEXT NOT NULL,
-                    last_fetch_time_utc TEXT NOT NULL,
-                    cluster_timezone TEXT,
-                    fetch_count INTEGER DEFAULT 0,
-                    updated_at TEXT NOT NULL
-                )
-            """)
+    def _migrate_schema(self, conn: sqlite3.Connection):
+        """Create or upgrade every table and index to the current schema.
 
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_hostname ON cached_jobs(hostname)"
+        Each step is idempotent, so databases from any earlier release, which
+        all report user_version 0, converge on the same schema.
+        """
+        # cached_jobs deliberately stays a rowid table: rows carry scripts
+        # and compressed outputs, far beyond the ~1/20 page size where
+        # WITHOUT ROWID pays off, and those blobs would otherwise be copied
+        # around on every split of the primary-key b-tree.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cached_jobs (
+                job_id TEXT,
+                hostname TEXT,
+                job_info_json TEXT NOT NULL,
+                script_content TEXT,
+                -- Compressed output storage
+                stdout_compressed BLOB,
+                stdout_size INTEGER DEFAULT 0,
+                stdout_compression TEXT DEFAULT 'none',
+                stderr_compressed BLOB,
+                stderr_size INTEGER DEFAULT 0,
+                stderr_compression TEXT DEFAULT 'none',
+                cached_at TEXT NOT NULL,
+                last_updated TEXT NOT NULL,
+                is_active BOOLEAN NOT NULL DEFAULT 1,
+                stdout_fetched_after_completion BOOLEAN DEFAULT 0,
+                stderr_fetched_after_completion BOOLEAN DEFAULT 0,
+                PRIMARY KEY (job_id, hostname)
             )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_cached_at ON cached_jobs(cached_at)"
+        """)
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_manifests (
+                job_id TEXT NOT NULL,
+                hostname TEXT NOT NULL,
+                manifest_version INTEGER NOT NULL DEFAULT 1,
+                manifest_json TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (job_id, hostname)
             )
+        """)
+
+        # Add columns if they don't exist (for migration)
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_is_active ON cached_jobs(is_active)"
+                "ALTER TABLE cached_jobs ADD COLUMN stdout_fetched_after_completion BOOLEAN DEFAULT 0"
             )
-            # Add composite index for faster completed job lookups
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_completed_jobs ON cached_jobs(hostname, is_active)"
+                "ALTER TABLE cached_jobs ADD COLUMN stderr_fetched_after_completion BOOLEAN DEFAULT 0"
             )
-
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_range_hostname ON cached_job_ranges(hostname)"
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
+            conn.execute("ALTER TABLE cached_jobs ADD COLUMN local_source_dir TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cached_job_ranges (
+                cache_key TEXT PRIMARY KEY,
+                hostname TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                filters_json TEXT NOT NULL,
+                job_ids_json TEXT NOT NULL,
+                cached_at TEXT NOT NULL,
+                expires_at TEXT NOT NULL,
+                hit_count INTEGER DEFAULT 0
             )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_range_expires ON cached_job_ranges(expires_at)"
+        """)
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS host_fetch_state (
+                hostname TEXT PRIMARY KEY,
+                last_fetch_time TEXT NOT NULL,
+                last_fetch_time_utc TEXT NOT NULL,
+                cluster_timezone TEXT,
+                fetch_count INTEGER DEFAULT 0,
+                updated_at TEXT NOT NULL
             )
+        """)
 
-            # Watcher tables for job monitoring
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS job_watchers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    job_id TEXT NOT NULL,
-                    hostname TEXT NOT NULL,
-                    name TEXT,
-                    pattern TEXT NOT NULL,
-                    interval_seconds INTEGER NOT NULL DEFAULT 60,
-                    captures_json TEXT,
-                    condition TEXT,
-                    actions_json TEXT NOT NULL,
-                    last_check TEXT,
-                    last_position INTEGER DEFAULT 0,
-                    trigger_count INTEGER DEFAULT 0,
-                    failure_count INTEGER DEFAULT 0,
-                    max_failures INTEGER,
-                    state TEXT DEFAULT 'active',
-                    timer_mode_enabled INTEGER DEFAULT 0,
-                    timer_interval_seconds INTEGER DEFAULT 30,
-                    timer_mode_active INTEGER DEFAULT 0,
-                    trigger_on_job_end INTEGER DEFAULT 0,
-                    trigger_job_states_json TEXT,
-                    created_at TEXT NOT NULL,
-                    FOREIGN KEY (job_id, hostname) REFERENCES cached_jobs(job_id, hostname)
-                )
-            """)
-
-            # Add timer mode columns if they don't exist (for migration)
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN timer_mode_enabled INTEGER DEFAULT 0"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN timer_interval_seconds INTEGER DEFAULT 30"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN timer_mode_active INTEGER DEFAULT 0"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN trigger_on_job_end INTEGER DEFAULT 0"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN trigger_job_states_json TEXT"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN failure_count INTEGER DEFAULT 0"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute("ALTER TABLE job_watchers ADD COLUMN max_failures INTEGER")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
+        # Small key/value store for cache bookkeeping (e.g. ANALYZE state)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
 
-            # Add array template columns if they don't exist (for migration)
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN is_array_template INTEGER DEFAULT 0"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute("ALTER TABLE job_watchers ADD COLUMN array_spec TEXT")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN parent_watcher_id INTEGER"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN discovered_task_count INTEGER DEFAULT 0"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            try:
-                conn.execute(
-                    "ALTER TABLE job_watchers ADD COLUMN expected_task_count INTEGER"
-                )
-            except sqlite3.OperationalError:
-                pass  # Column already exists
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_hostname ON cached_jobs(hostname)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cached_at ON cached_jobs(cached_at)"
+        )
+        # Serves "WHERE is_active = 1 ORDER BY last_updated DESC LIMIT n" in
+        # index order; it also covers every lookup idx_is_active served.
+        conn.execute("DROP INDEX IF EXISTS idx_is_active")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_active_updated ON cached_jobs(is_active, last_updated DESC, hostname)"
+        )
 
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS watcher_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    watcher_id INTEGER NOT NULL,
-                    job_id TEXT NOT NULL,
-                    hostname TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    matched_text TEXT,
-                    captured_vars_json TEXT,
-                    action_type TEXT NOT NULL,
-                    action_result TEXT,
-                    success BOOLEAN NOT NULL,
-                    FOREIGN KEY (watcher_id) REFERENCES job_watchers(id)
-                )
-            """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_range_hostname ON cached_job_ranges(hostname)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_range_expires ON cached_job_ranges(expires_at)"
+        )
 
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS watcher_variables (
-                    watcher_id INTEGER NOT NULL,
-                    variable_name TEXT NOT NULL,
-                    variable_value TEXT,
-                    updated_at TEXT NOT NULL,
-                    PRIMARY KEY (watcher_id, variable_name),
-                    FOREIGN KEY (watcher_id) REFERENCES job_watchers(id)
-                )
-            """)
+        # Watcher tables for job monitoring
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_watchers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                hostname TEXT NOT NULL,
+                name TEXT,
+                pattern TEXT NOT NULL,
+                interval_seconds INTEGER NOT NULL DEFAULT 60,
+                captures_json TEXT,
+                condition TEXT,
+                actions_json TEXT NOT NULL,
+                last_check TEXT,
+                last_position INTEGER DEFAULT 0,
+                trigger_count INTEGER DEFAULT 0,
+                failure_count INTEGER DEFAULT 0,
+                max_failures INTEGER,
+                state TEXT DEFAULT 'active',
+                timer_mode_enabled INTEGER DEFAULT 0,
+                timer_interval_seconds INTEGER DEFAULT 30,
+                timer_mode_active INTEGER DEFAULT 0,
+                trigger_on_job_end INTEGER DEFAULT 0,
+                trigger_job_states_json TEXT,
+                created_at TEXT NOT NULL,
+                FOREIGN KEY (job_id, hostname) REFERENCES cached_jobs(job_id, hostname)
+            )
+        """)
 
-            # Create indices for watchers
+        # Add timer mode columns if they don't exist (for migration)
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_watchers_job ON job_watchers(job_id, hostname)"
+                "ALTER TABLE job_watchers ADD COLUMN timer_mode_enabled INTEGER DEFAULT 0"
             )
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_watchers_state ON job_watchers(state)"
+                "ALTER TABLE job_watchers ADD COLUMN timer_interval_seconds INTEGER DEFAULT 30"
             )
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_events_watcher ON watcher_events(watcher_id)"
+                "ALTER TABLE job_watchers ADD COLUMN timer_mode_active INTEGER DEFAULT 0"
             )
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON watcher_events(timestamp)"
+                "ALTER TABLE job_watchers ADD COLUMN trigger_on_job_end INTEGER DEFAULT 0"
             )
-
-            # Notification device registrations
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS notification_devices (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    api_key_hash TEXT NOT NULL,
-                    device_token TEXT NOT NULL,
-                    platform TEXT NOT NULL,
-                    token_type TEXT NOT NULL DEFAULT 'apns',
-                    client_type TEXT NOT NULL DEFAULT 'native',
-                    payload_format TEXT NOT NULL DEFAULT 'apns',
-                    bundle_id TEXT,
-                    environment TEXT,
-                    device_id TEXT,
-                    enabled BOOLEAN NOT NULL DEFAULT 1,
-                    created_at TEXT NOT NULL,
-                    last_seen TEXT NOT NULL,
-                    UNIQUE(api_key_hash, device_token)
-                )
-            """)
-            for column_name, column_type, default_value in (
-                ("token_type", "TEXT", "'apns'"),
-                ("client_type", "TEXT", "'native'"),
-                ("payload_format", "TEXT", "'apns'"),
-            ):
-                try:
-                    conn.execute(
-                        f"ALTER TABLE notification_devices ADD COLUMN {column_name} {column_type} NOT NULL DEFAULT {default_value}"
-                    )
-                except sqlite3.OperationalError:
-                    pass
-
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_notification_devices_key ON notification_devices(api_key_hash)"
+                "ALTER TABLE job_watchers ADD COLUMN trigger_job_states_json TEXT"
             )
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_notification_devices_platform ON notification_devices(platform)"
+                "ALTER TABLE job_watchers ADD COLUMN failure_count INTEGER DEFAULT 0"
             )
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
+            conn.execute("ALTER TABLE job_watchers ADD COLUMN max_failures INTEGER")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
 
-            # Notification preferences (per API key)
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS notification_preferences (
-                    api_key_hash TEXT PRIMARY KEY,
-                    enabled BOOLEAN NOT NULL DEFAULT 1,
-                    allowed_states_json TEXT,
-                    muted_job_ids_json TEXT,
-                    muted_hosts_json TEXT,
-                    muted_job_name_patterns_json TEXT,
-                    allowed_users_json TEXT,
-                    updated_at TEXT NOT NULL
-                )
-            """)
-
-            # Web Push subscriptions
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS webpush_subscriptions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    api_key_hash TEXT NOT NULL,
-                    endpoint TEXT NOT NULL,
-                    p256dh TEXT NOT NULL,
-                    auth TEXT NOT NULL,
-                    user_agent TEXT,
-                    enabled BOOLEAN NOT NULL DEFAULT 1,
-                    created_at TEXT NOT NULL,
-                    last_seen TEXT NOT NULL,
-                    UNIQUE(api_key_hash, endpoint)
-                )
-            """)
-
+        # Add array template columns if they don't exist (for migration)
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_webpush_subscriptions_key ON webpush_subscriptions(api_key_hash)"
+                "ALTER TABLE job_watchers ADD COLUMN is_array_template INTEGER DEFAULT 0"
             )
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
+            conn.execute("ALTER TABLE job_watchers ADD COLUMN array_spec TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_webpush_subscriptions_enabled ON webpush_subscriptions(enabled)"
+                "ALTER TABLE job_watchers ADD COLUMN parent_watcher_id INTEGER"
             )
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS job_notification_states (
-                    job_key TEXT PRIMARY KEY,
-                    job_id TEXT NOT NULL,
-                    hostname TEXT NOT NULL,
-                    last_seen_state TEXT NOT NULL,
-                    last_seen_at TEXT NOT NULL,
-                    last_changed_at TEXT NOT NULL,
-                    job_name TEXT,
-                    user TEXT
-                )
-            """)
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_job_notification_states_job ON job_notification_states(job_id, hostname)"
+                "ALTER TABLE job_watchers ADD COLUMN discovered_task_count INTEGER DEFAULT 0"
             )
-
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS notification_events (
-                    notification_id TEXT PRIMARY KEY,
-                    job_id TEXT NOT NULL,
-                    hostname TEXT NOT NULL,
-                    old_state TEXT,
-                    new_state TEXT NOT NULL,
-                    changed_at TEXT NOT NULL,
-                    job_name TEXT,
-                    user TEXT,
-                    payload_json TEXT NOT NULL,
-                    status TEXT NOT NULL DEFAULT 'pending',
-                    created_at TEXT NOT NULL,
-                    sent_at TEXT,
-                    sent_count INTEGER NOT NULL DEFAULT 0,
-                    last_error TEXT
-                )
-            """)
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        try:
             conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_notification_events_status ON notification_events(status, created_at)"
+                "ALTER TABLE job_watchers ADD COLUMN expected_task_count INTEGER"
+            )
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS watcher_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                watcher_id INTEGER NOT NULL,
+                job_id TEXT NOT NULL,
+                hostname TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                matched_text TEXT,
+                captured_vars_json TEXT,
+                action_type TEXT NOT NULL,
+                action_result TEXT,
+                success BOOLEAN NOT NULL,
+                FOREIGN KEY (watcher_id) REFERENCES job_watchers(id)
             )
+        """)
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS watcher_variables (
+                watcher_id INTEGER NOT NULL,
+                variable_name TEXT NOT NULL,
+                variable_value TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (watcher_id, variable_name),
+                FOREIGN KEY (watcher_id) REFERENCES job_watchers(id)
+            )
+        """)
 
-            # Array job metadata tables for efficient grouping and querying
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS array_jobs (
-                    array_job_id TEXT,
-                    hostname TEXT,
-                    job_name TEXT,
-                    user TEXT,
-                    script_content TEXT,
-                    total_tasks INTEGER DEFAULT 0,
-                    submit_time TEXT,
-                    partition TEXT,
-                    account TEXT,
-                    work_dir TEXT,
-                    created_at TEXT NOT NULL,
-                    last_updated TEXT NOT NULL,
-                    PRIMARY KEY (array_job_id, hostname)
-                )
-            """)
+        # Create indices for watchers
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_watchers_job ON job_watchers(job_id, hostname)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_watchers_state ON job_watchers(state)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_watcher ON watcher_events(watcher_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON watcher_events(timestamp)"
+        )
 
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS array_task_stats (
-                    array_job_id TEXT,
-                    hostname TEXT,
-                    state TEXT,
-                    count INTEGER DEFAULT 0,
-                    last_updated TEXT NOT NULL,
-                    PRIMARY KEY (array_job_id, hostname, state),
-                    FOREIGN KEY (array_job_id, hostname)
-                        REFERENCES array_jobs(array_job_id, hostname)
+        # Notification device registrations
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS notification_devices (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                api_key_hash TEXT NOT NULL,
+                device_token TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                token_type TEXT NOT NULL DEFAULT 'apns',
+                client_type TEXT NOT NULL DEFAULT 'native',
+                payload_format TEXT NOT NULL DEFAULT 'apns',
+                bundle_id TEXT,
+                environment TEXT,
+                device_id TEXT,
+                enabled BOOLEAN NOT NULL DEFAULT 1,
+                created_at TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                UNIQUE(api_key_hash, device_token)
+            )
+        """)
+        for column_name, column_type, default_value in (
+            ("token_type", "TEXT", "'apns'"),
+            ("client_type", "TEXT", "'native'"),
+            ("payload_format", "TEXT", "'apns'"),
+        ):
+            try:
+                conn.execute(
+                    f"ALTER TABLE notification_devices ADD COLUMN {column_name} {column_type} NOT NULL DEFAULT {default_value}"
                 )
-            """)
+            except sqlite3.OperationalError:
+                pass
 
-            # Indices for array job queries
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_array_jobs_hostname ON array_jobs(hostname)"
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_notification_devices_key ON notification_devices(api_key_hash)"
+        )
+        # Dispatch lists filter on platform and enabled together
+        conn.execute("DROP INDEX IF EXISTS idx_notification_devices_platform")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_notification_devices_dispatch ON notification_devices(platform, enabled)"
+        )
+
+        # Notification preferences (per API key)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS notification_preferences (
+                api_key_hash TEXT PRIMARY KEY,
+                enabled BOOLEAN NOT NULL DEFAULT 1,
+                allowed_states_json TEXT,
+                muted_job_ids_json TEXT,
+                muted_hosts_json TEXT,
+                muted_job_name_patterns_json TEXT,
+                allowed_users_json TEXT,
+                updated_at TEXT NOT NULL
             )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_array_jobs_user ON array_jobs(hostname, user)"
+        """)
+
+        # Web Push subscriptions
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS webpush_subscriptions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                api_key_hash TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                p256dh TEXT NOT NULL,
+                auth TEXT NOT NULL,
+                user_agent TEXT,
+                enabled BOOLEAN NOT NULL DEFAULT 1,
+                created_at TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                UNIQUE(api_key_hash, endpoint)
             )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_array_task_stats_array ON array_task_stats(array_job_id, hostname)"
+        """)
+
+        conn.execute("DROP INDEX IF EXISTS idx_webpush_subscriptions_key")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webpush_subscriptions_key_enabled ON webpush_subscriptions(api_key_hash, enabled)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webpush_subscriptions_enabled ON webpush_subscriptions(enabled)"
+        )
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_notification_states (
+                job_key TEXT PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                hostname TEXT NOT NULL,
+                last_seen_state TEXT NOT NULL,
+                last_seen_at TEXT NOT NULL,
+                last_changed_at TEXT NOT NULL,
+                job_name TEXT,
+                user TEXT
             )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_job_notification_states_job ON job_notification_states(job_id, hostname)"
+        )
 
-            # Add array_job_id column to cached_jobs for easier filtering (migration safe)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS notification_events (
+                notification_id TEXT PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                hostname TEXT NOT NULL,
+                old_state TEXT,
+                new_state TEXT NOT NULL,
+                changed_at TEXT NOT NULL,
+                job_name TEXT,
+                user TEXT,
+                payload_json TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                created_at TEXT NOT NULL,
+                sent_at TEXT,
+                sent_count INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_notification_events_status ON notification_events(status, created_at)"
+        )
+
+        # Array job metadata tables for efficient grouping and querying
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS array_jobs (
+                array_job_id TEXT,
+                hostname TEXT,
+                job_name TEXT,
+                user TEXT,
+                script_content TEXT,
+                total_tasks INTEGER DEFAULT 0,
+                submit_time TEXT,
+                partition TEXT,
+                account TEXT,
+                work_dir TEXT,
+                created_at TEXT NOT NULL,
+                last_updated TEXT NOT NULL,
+                PRIMARY KEY (array_job_id, hostname)
+            )
+        """)
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS array_task_stats (
+                array_job_id TEXT,
+                hostname TEXT,
+                state TEXT,
+                count INTEGER DEFAULT 0,
+                last_updated TEXT NOT NULL,
+                PRIMARY KEY (array_job_id, hostname, state),
+                FOREIGN KEY (array_job_id, hostname)
+                    REFERENCES array_jobs(array_job_id, hostname)
+            )
+        """)
+
+        # Indices for array job queries
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_array_jobs_hostname ON array_jobs(hostname)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_array_jobs_user ON array_jobs(hostname, user)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_array_task_stats_array ON array_task_stats(array_job_id, hostname)"
+        )
+
+        # Add array_job_id column to cached_jobs for easier filtering (migration safe)
+        try:
+            conn.execute("ALTER TABLE cached_jobs ADD COLUMN array_job_id TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+
+        # Add index on array_job_id for fast task lookups
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cached_jobs_array_id ON cached_jobs(array_job_id, hostname)"
+        )
+
+        # Earlier schemas flagged template rows through a generated
+        # is_array_template column. The cache dir is often on a shared home
+        # directory and SQLite < 3.31 can't open a file with a generated
+        # column, so it is dropped again along with everything that read it;
+        # the triggers are recreated below.
+        conn.execute("DROP INDEX IF EXISTS idx_cached_jobs_array_tasks")
+        conn.execute("DROP INDEX IF EXISTS idx_cached_jobs_array_task_ids")
+        for trigger in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_array_task_stats_{trigger}")
+        try:
+            conn.execute("ALTER TABLE cached_jobs DROP COLUMN is_array_template")
+        except sqlite3.OperationalError:
+            pass  # Column never added, or SQLite < 3.35 can't drop it
+        # Partial index over task rows only, so task lookups avoid a
+        # leading-wildcard LIKE on job_id. Ending on job_id lets task
+        # listings walk the index in job_id order instead of sorting.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cached_jobs_array_task_ids "
+            "ON cached_jobs(array_job_id, hostname, job_id) "
+            f"WHERE {_ARRAY_TASK_CLAUSE}"
+        )
+
+        # Denormalized JobInfo fields, so filters don't have to parse
+        # job_info_json. submit_time is normalized through datetime() (UTC,
+        # 'YYYY-MM-DD HH:MM:SS') so it compares correctly as plain text.
+        added_job_columns = False
+        for column in ("state", "user", "partition", "submit_time", "runtime"):
             try:
-                conn.execute("ALTER TABLE cached_jobs ADD COLUMN array_job_id TEXT")
+                conn.execute(f"ALTER TABLE cached_jobs ADD COLUMN {column} TEXT")
+                added_job_columns = True
             except sqlite3.OperationalError:
                 pass  # Column already exists
+        if added_job_columns:
+            conn.execute("""
+                UPDATE cached_jobs SET
+                    state = json_extract(job_info_json, '$.state'),
+                    user = json_extract(job_info_json, '$.user'),
+                    partition = json_extract(job_info_json, '$.partition'),
+                    submit_time = datetime(
+                        json_extract(job_info_json, '$.submit_time')
+                    ),
+                    runtime = json_extract(job_info_json, '$.runtime')
+                WHERE json_valid(job_info_json)
+            """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cached_jobs_state ON cached_jobs(hostname, state)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cached_jobs_submit ON cached_jobs(hostname, submit_time)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cached_jobs_user ON cached_jobs(hostname, user)"
+        )
+        # Active rows are a small slice of the table; verification reads
+        # their keys from this index alone. The leading is_active gives the
+        # planner the same equality match idx_active_updated offers.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cached_jobs_active_keys "
+            "ON cached_jobs(is_active, hostname, job_id) WHERE is_active = 1"
+        )
+        # Size-based eviction walks script-less rows oldest first
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cached_jobs_evictable ON cached_jobs(cached_at) "
+            "WHERE script_content IS NULL OR script_content = ''"
+        )
+        # Completed-ID lookups seek (hostname, is_active) and range-scan
+        # submit_time; it also serves every lookup idx_completed_jobs did.
+        conn.execute("DROP INDEX IF EXISTS idx_completed_jobs")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_completed_jobs_submit ON cached_jobs(hostname, is_active, submit_time)"
+        )
+
+        # Per-state task counts follow cached_jobs through triggers. Rebuild
+        # them once so rows written before the triggers existed are counted.
+        for trigger_sql in _ARRAY_TASK_STATS_TRIGGERS:
+            conn.execute(trigger_sql)
+        conn.execute("DELETE FROM array_task_stats")
+        conn.execute(
+            f"""
+            INSERT INTO array_task_stats
+            (array_job_id, hostname, state, count, last_updated)
+            SELECT array_job_id, hostname, state, COUNT(*), {_ARRAY_TASK_STATS_NOW}
+            FROM cached_jobs
+            WHERE array_job_id IS NOT NULL AND state IS NOT NULL
+              AND {_ARRAY_TASK_CLAUSE}
+            GROUP BY array_job_id, hostname, state
+            """
+        )
+
+    def _schedule_optimize(self):
+        """Arm the timer for the next periodic statistics refresh."""
+        timer = threading.Timer(_OPTIMIZE_INTERVAL_SECONDS, self._periodic_optimize)
+        timer.daemon = True
+        self._optimize_timer = timer
+        timer.start()
+
+    def maintenance(self):
+        """Refresh planner statistics and fold the WAL back into the database.
+
+        Uses a short-lived connection so a timer thread calling it does not
+        leave one behind in the per-thread registry.
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened or updated
+        """
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._analyze_if_stale(conn)
+            conn.commit()
+            conn.execute("PRAGMA optimize")
+            # Checkpoint everything and reset the WAL to zero length, so it
+            # doesn't keep the size of the largest burst of writes
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        finally:
+            conn.close()
+
+    def _periodic_optimize(self):
+        """Run maintenance, then re-arm unless the cache was closed."""
+        try:
+            self.maintenance()
+        except sqlite3.Error as e:
+            logger.debug(f"Periodic cache optimize failed: {e}")
+
+        with self._connections_lock:
+            if self._optimize_timer is not None:
+                self._schedule_optimize()
 
-            # Add index on array_job_id for fast task lookups
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_cached_jobs_array_id ON cached_jobs(array_job_id, hostname)"
-            )
+    def _analyze_if_stale(self, conn: sqlite3.Connection) -> bool:
+        """Refresh cached_jobs planner statistics once its size has drifted.
 
-            conn.commit()
+        Statistics are recollected when no ANALYZE has been recorded yet, or
+        when the row count moved by more than 10% since the last one.
+
+        Returns:
+            True if ANALYZE was run
+        """
+        row_count = conn.execute("SELECT COUNT(*) FROM cached_jobs").fetchone()[0]
+        row = conn.execute(
+            "SELECT value FROM cache_meta WHERE key = 'analyze_row_count'"
+        ).fetchone()
+        if row is not None:
+            analyzed_count = int(row["value"])
+            if abs(row_count - analyzed_count) <= analyzed_count * 0.1:
+                return False
+
+        conn.execute("ANALYZE cached_jobs")
+        conn.execute(
+            """
+            INSERT INTO cache_meta (key, value) VALUES ('analyze_row_count', ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            """,
+            (str(row_count),),
+        )
+        return True
 
     @contextmanager
     def _get_connection(self):
-        """Get thread-safe database connection."""
-        with self._lock:
-            conn = sqlite3.connect(str(self.db_path), timeout=30.0)
-            conn.row_factory = sqlite3.Row
-            # Set WAL mode for this connection (idempotent, safe to call multiple times)
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA busy_timeout=10000")
+        """Get this thread's database connection, opening it on first use.
+
+        Connections are kept open and reused by the thread that opened them.
+        Anything still uncommitted when the outermost block exits is rolled
+        back, matching the old open-per-call behaviour.
+        """
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.generation != self._generation:
+            conn = self._open_connection()
+            local.conn = conn
+            local.generation = self._generation
+            local.depth = 0
+            local.row_memo = OrderedDict()
+            local.row_memo_stamp = None
+
+        local.depth += 1
+        try:
+            yield conn
+        finally:
+            local.depth -= 1
+            if local.depth == 0 and conn.in_transaction:
+                conn.rollback()
+
+    @contextmanager
+    def _write_tx(self):
+        """Run a block of writes as one BEGIN IMMEDIATE transaction.
+
+        Taking the write lock up front means the transaction never has to
+        upgrade from a read lock midway, where a concurrent writer would make
+        it fail with SQLITE_BUSY. Nested use joins the enclosing transaction.
+        """
+        with self._get_connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
             try:
                 yield conn
-            finally:
-                conn.close()
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open and register a connection for the current thread."""
+        # check_same_thread is off only so close() can close every thread's
+        # connection; each connection is otherwise used by its own thread.
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=30.0,
+            check_same_thread=False,
+            cached_statements=_STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
+        with self._connections_lock:
+            # Drop connections left behind by threads that have exited
+            for thread in [t for t in self._connections if not t.is_alive()]:
+                self._connections.pop(thread).close()
+            self._connections[threading.current_thread()] = conn
+        return conn
 
     def _merge_job_info(self, new_job: JobInfo, existing_job: JobInfo) -> JobInfo:
         """
@@ -566,50 +1407,35 @@ class JobDataCache:
         2. Existing non-None/non-empty values (preservation)
         3. New None/empty values (fallback)
         """
+        new_values = new_job.__dict__
+        existing_values = existing_job.__dict__
         merged_data = {}
-        for field in fields(JobInfo):
-            new_val = getattr(new_job, field.name)
-            existing_val = getattr(existing_job, field.name)
-
-            critical_fields = [
-                "stdout_file",
-                "stderr_file",
-                "work_dir",
-                "submit_line",
-                "req_tres",
-                "alloc_tres",
-                "node_list",
-            ]
-
-            if field.name in critical_fields:
-                if existing_val and not new_val:
-                    merged_data[field.name] = existing_val
-                    logger.debug(
-                        f"Preserving critical field {field.name} for job {new_job.job_id}"
-                    )
-                else:
-                    merged_data[field.name] = new_val if new_val else existing_val
+        for name in _JOB_INFO_FIELDS:
+            new_val = new_values[name]
+            if name in _CRITICAL_JOB_INFO_FIELDS:
+                merged_data[name] = new_val or existing_values[name]
+            elif new_val is not None:
+                merged_data[name] = new_val
             else:
-                merged_data[field.name] = (
-                    new_val if new_val is not None else existing_val
-                )
+                merged_data[name] = existing_values[name]
+
+        # Both inputs are already JobInfo instances, so skip __init__
+        return _construct_job_info(merged_data)
 
-        return JobInfo(**merged_data)
+    def _deserialize_job_info(
+        self, job_info_dict: Dict[str, Any], *, trusted: bool = False
+    ) -> JobInfo:
+        """Convert cached JSON back into JobInfo while tolerating forward fields.
 
-    def _deserialize_job_info(self, job_info_dict: Dict[str, Any]) -> JobInfo:
-        """Convert cached JSON back into JobInfo while tolerating forward fields."""
+        With ``trusted=True`` the dataclass constructor is skipped for rows that
+        carry every required field, which is considerably cheaper in bulk reads.
+        """
         normalized = dict(job_info_dict)
 
         if "state" in normalized and isinstance(normalized["state"], str):
-            from .models.job import JobState
-
-            try:
-                normalized["state"] = JobState(normalized["state"])
-            except ValueError:
-                normalized["state"] = JobState.UNKNOWN
+            normalized["state"] = _JOB_STATES.get(normalized["state"], JobState.UNKNOWN)
 
-        valid_field_names = {field.name for field in fields(JobInfo)}
-        unknown_fields = sorted(set(normalized) - valid_field_names)
+        unknown_fields = sorted(set(normalized) - _JOB_INFO_FIELD_NAMES)
         if unknown_fields:
             job_id = normalized.get("job_id", "<unknown>")
             logger.warning(
@@ -620,9 +1446,11 @@ class JobDataCache:
             normalized = {
                 key: value
                 for key, value in normalized.items()
-                if key in valid_field_names
+                if key in _JOB_INFO_FIELD_NAMES
             }
 
+        if trusted and _JOB_INFO_REQUIRED_FIELDS.issubset(normalized):
+            return _construct_job_info(normalized)
         return JobInfo(**normalized)
 
     def _build_cached_job_data(
@@ -636,9 +1464,7 @@ class JobDataCache:
     ) -> CachedJobData:
         """Build a cache row while preserving durable fields from an old row."""
         now = now or datetime.now()
-        from .models.job import JobState as JS
-
-        is_active = job_info.state in [JS.PENDING, JS.RUNNING]
+        is_active = job_info.state in _ACTIVE_JOB_STATES
 
         if existing_cached:
             if script_content is None and existing_cached.script_content:
@@ -712,7 +1538,16 @@ class JobDataCache:
             script_content: Optional script content (if None, preserves existing)
             local_source_dir: Optional local source directory that was synced
         """
-        existing_cached = self.get_cached_job(job_info.job_id, job_info.hostname)
+        # Read the old row directly: a memo entry would be invalidated by the
+        # write below, and nothing here mutates the result, so the memo's
+        # defensive copy is wasted work
+        with self._get_connection() as conn:
+            existing_cached = self._query_cached_job(
+                conn,
+                job_info.job_id,
+                job_info.hostname,
+                self.cache_settings.recycled_id_max_age_days,
+            )
         cached_data = self._build_cached_job_data(
             job_info,
             existing_cached=existing_cached,
@@ -720,7 +1555,9 @@ class JobDataCache:
             local_source_dir=local_source_dir,
         )
 
-        self._store_cached_data(cached_data)
+        self._store_cached_data(
+            cached_data, preserve_existing=existing_cached is not None
+        )
 
     def cache_jobs(self, job_infos: List[JobInfo]) -> None:
         """Cache many jobs in a single connection and transaction."""
@@ -735,19 +1572,34 @@ class JobDataCache:
         ]
         existing_by_key = self._get_cached_jobs_for_keys(keys)
 
-        with self._get_connection() as conn:
-            for job_info in job_infos:
-                if not job_info.job_id or not job_info.hostname:
-                    continue
-                cached_data = self._build_cached_job_data(
-                    job_info,
-                    existing_cached=existing_by_key.get(
-                        (job_info.job_id, job_info.hostname)
-                    ),
-                    now=now,
+        rows = []
+        # Array metadata only depends on the latest task of each array and
+        # the latest script seen for it, so it is refreshed once per array
+        array_tasks: Dict[Tuple[str, str], Tuple[JobInfo, Optional[str]]] = {}
+        for job_info in job_infos:
+            if not job_info.job_id or not job_info.hostname:
+                continue
+            existing_cached = existing_by_key.get((job_info.job_id, job_info.hostname))
+            cached_data = self._build_cached_job_data(
+                job_info, existing_cached=existing_cached, now=now
+            )
+            rows.append(
+                self._cached_job_params(
+                    cached_data, preserve_existing=existing_cached is not None
                 )
-                self._store_cached_data_in_connection(conn, cached_data)
-            conn.commit()
+            )
+            task_info = cached_data.job_info
+            if task_info.array_job_id and "[" not in (task_info.array_task_id or ""):
+                array_key = (task_info.array_job_id, task_info.hostname)
+                previous = array_tasks.get(array_key)
+                script = cached_data.script_content or (previous and previous[1])
+                array_tasks[array_key] = (task_info, script)
+
+        now_iso = now.isoformat()
+        with self._write_tx() as conn:
+            conn.executemany(_UPSERT_CACHED_JOB_SQL, rows)
+            for task_info, script_content in array_tasks.values():
+                self._update_array_metadata(conn, task_info, script_content, now_iso)
 
     def _get_cached_jobs_for_keys(
         self,
@@ -765,244 +1617,134 @@ class JobDataCache:
 
         results: Dict[Tuple[str, str], CachedJobData] = {}
         unique_keys = list(dict.fromkeys(keys))
-        chunk_size = 250
+        chunk_size = 256
         with self._get_connection() as conn:
             for i in range(0, len(unique_keys), chunk_size):
-                chunk = unique_keys[i : i + chunk_size]
-                conditions = " OR ".join(
-                    ["(job_id = ? AND hostname = ?)"] * len(chunk)
-                )
+                chunk = _pad_chunk(unique_keys[i : i + chunk_size], (None, None))
+                # Join against the keys as a VALUES table so each pair is one
+                # primary-key probe, rather than an OR chain the planner has to
+                # expand term by term
+                values = _values_placeholders(len(chunk))
                 params: List[Any] = [
                     value for job_id, hostname in chunk for value in (job_id, hostname)
                 ]
-                query = f"SELECT * FROM cached_jobs WHERE ({conditions})"
+                query = f"""
+                    WITH keys(job_id, hostname) AS (VALUES {values})
+                    SELECT {_KEYED_CACHED_JOB_COLUMNS} FROM keys
+                    JOIN cached_jobs c
+                      ON c.job_id = keys.job_id AND c.hostname = keys.hostname
+                """
+                query += " WHERE 1=1"
                 if cache_cutoff:
-                    query += " AND cached_at >= ?"
+                    query += " AND c.cached_at >= ?"
                     params.append(cache_cutoff)
+                if submit_time_cutoff:
+                    query += _SUBMIT_TIME_FRESH_CLAUSE
+                    params.append(submit_time_cutoff)
 
-                cursor = conn.execute(query, params)
-                for row in cursor.fetchall():
+                for row in conn.execute(query, params):
                     cached_data = self._row_to_cached_data(row)
-                    if cached_data.job_info and cached_data.job_info.submit_time:
-                        if self._is_submit_time_older_than_cutoff(
-                            cached_data.job_info.submit_time, submit_time_cutoff
-                        ):
-                            continue
                     results[(cached_data.job_id, cached_data.hostname)] = cached_data
 
         return results
 
-    def _store_cached_data(self, cached_data: CachedJobData):
+    def _store_cached_data(
+        self, cached_data: CachedJobData, preserve_existing: bool = False
+    ):
         """Store cached data in database and maintain array metadata."""
-        with self._get_connection() as conn:
-            self._store_cached_data_in_connection(conn, cached_data)
-            conn.commit()
-
-    def _store_cached_data_in_connection(self, conn, cached_data: CachedJobData):
-        """Store cached data using an existing database connection."""
-        job_info_dict = asdict(cached_data.job_info)
+        # Serialize before taking the write lock so other writers only wait
+        # on the SQL itself
+        params = self._cached_job_params(cached_data, preserve_existing)
 
-        # Convert enums to strings for JSON serialization
-        job_info_dict = self._prepare_dict_for_json(job_info_dict)
+        with self._write_tx() as conn:
+            conn.execute(_UPSERT_CACHED_JOB_SQL, params)
 
-        # Extract array_job_id from job_info
-        array_job_id = cached_data.job_info.array_job_id
-
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO cached_jobs
-            (job_id, hostname, job_info_json, script_content, local_source_dir,
-             stdout_compressed, stdout_size, stdout_compression,
-             stderr_compressed, stderr_size, stderr_compression,
-             cached_at, last_updated, is_active, array_job_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                cached_data.job_id,
-                cached_data.hostname,
-                json.dumps(job_info_dict),
-                cached_data.script_content,
-                cached_data.local_source_dir,
-                cached_data.stdout_compressed,
-                cached_data.stdout_size,
-                cached_data.stdout_compression,
-                cached_data.stderr_compressed,
-                cached_data.stderr_size,
-                cached_data.stderr_compression,
-                cached_data.cached_at.isoformat(),
-                cached_data.last_updated.isoformat(),
-                cached_data.is_active,
-                array_job_id,
-            ),
-        )
+            # Maintain array metadata if this is an array job
+            if cached_data.job_info.array_job_id:
+                self._update_array_metadata(
+                    conn, cached_data.job_info, cached_data.script_content
+                )
 
-        # Maintain array metadata if this is an array job
-        if array_job_id:
-            self._update_array_metadata(
-                conn, cached_data.job_info, cached_data.script_content
-            )
+    def _cached_job_params(
+        self, cached_data: CachedJobData, preserve_existing: bool
+    ) -> Dict[str, Any]:
+        """Build the named parameters for _UPSERT_CACHED_JOB_SQL.
+
+        Rows are upserted in place. With ``preserve_existing`` (the caller built
+        ``cached_data`` on top of a still-valid cached row) the stored outputs,
+        fetch flags and cached_at are left untouched and a missing script or
+        source dir keeps the stored one, so status refreshes never resend
+        output blobs. Otherwise the row is fully overwritten, as a recycled job
+        ID must not inherit anything from the job that used it before.
+        """
+        job_info = cached_data.job_info
+        return {
+            "job_id": cached_data.job_id,
+            "hostname": cached_data.hostname,
+            "job_info_json": _dump_job_info(job_info),
+            "script_content": cached_data.script_content,
+            "local_source_dir": cached_data.local_source_dir,
+            # Stored blobs are kept as-is when preserving; don't resend them
+            "stdout_compressed": None
+            if preserve_existing
+            else cached_data.stdout_compressed,
+            "stdout_size": cached_data.stdout_size,
+            "stdout_compression": cached_data.stdout_compression,
+            "stderr_compressed": None
+            if preserve_existing
+            else cached_data.stderr_compressed,
+            "stderr_size": cached_data.stderr_size,
+            "stderr_compression": cached_data.stderr_compression,
+            "cached_at": cached_data.cached_at.isoformat(),
+            "last_updated": cached_data.last_updated.isoformat(),
+            "is_active": cached_data.is_active,
+            "array_job_id": job_info.array_job_id,
+            "state": job_info.state.value,
+            "user": job_info.user,
+            "partition": job_info.partition,
+            "submit_time": job_info.submit_time,
+            "runtime": job_info.runtime,
+            "preserve": preserve_existing,
+        }
 
     def _update_array_metadata(
-        self, conn, job_info: JobInfo, script_content: Optional[str] = None
+        self,
+        conn,
+        job_info: JobInfo,
+        script_content: Optional[str] = None,
+        now_iso: Optional[str] = None,
     ):
-        """Update array job metadata and task statistics.
+        """Update array job metadata.
 
-        This method maintains the array_jobs and array_task_stats tables.
-        Should be called whenever an array job task is cached.
+        This method maintains the array_jobs table; array_task_stats is kept
+        current by triggers on cached_jobs. Should be called whenever an array
+        job task is cached.
         """
         array_job_id = job_info.array_job_id
         hostname = job_info.hostname
         array_task_id = job_info.array_task_id
-        now = datetime.now()
 
         # Skip parent entries (with brackets) - we only track actual tasks
         if array_task_id and "[" in array_task_id:
             return
 
-        # Ensure array_jobs record exists
-        cursor = conn.execute(
-            "SELECT 1 FROM array_jobs WHERE array_job_id = ? AND hostname = ?",
-            (array_job_id, hostname),
-        )
-        array_exists = cursor.fetchone() is not None
-
-        if not array_exists:
-            # Create new array job record
-            conn.execute(
-                """
-                INSERT INTO array_jobs
-                (array_job_id, hostname, job_name, user, script_content,
-                 total_tasks, submit_time, partition, account, work_dir,
-                 created_at, last_updated)
-                VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    array_job_id,
-                    hostname,
-                    job_info.name,
-                    job_info.user,
-                    script_content,
-                    job_info.submit_time,
-                    job_info.partition,
-                    job_info.account,
-                    job_info.work_dir,
-                    now.isoformat(),
-                    now.isoformat(),
-                ),
-            )
-            logger.debug(f"Created array job metadata for {array_job_id} on {hostname}")
-        else:
-            # Update existing array job record (preserve script if not provided)
-            if script_content:
-                conn.execute(
-                    """
-                    UPDATE array_jobs
-                    SET job_name = ?, user = ?, script_content = ?,
-                        submit_time = ?, partition = ?, account = ?, work_dir = ?,
-                        last_updated = ?
-                    WHERE array_job_id = ? AND hostname = ?
-                    """,
-                    (
-                        job_info.name,
-                        job_info.user,
-                        script_content,
-                        job_info.submit_time,
-                        job_info.partition,
-                        job_info.account,
-                        job_info.work_dir,
-                        now.isoformat(),
-                        array_job_id,
-                        hostname,
-                    ),
-                )
-            else:
-                conn.execute(
-                    """
-                    UPDATE array_jobs
-                    SET job_name = ?, user = ?,
-                        submit_time = ?, partition = ?, account = ?, work_dir = ?,
-                        last_updated = ?
-                    WHERE array_job_id = ? AND hostname = ?
-                    """,
-                    (
-                        job_info.name,
-                        job_info.user,
-                        job_info.submit_time,
-                        job_info.partition,
-                        job_info.account,
-                        job_info.work_dir,
-                        now.isoformat(),
-                        array_job_id,
-                        hostname,
-                    ),
-                )
-
-        # Update task count
-        cursor = conn.execute(
-            """
-            SELECT COUNT(*) as task_count FROM cached_jobs
-            WHERE array_job_id = ? AND hostname = ?
-              AND job_id NOT LIKE '%[%'
-            """,
-            (array_job_id, hostname),
-        )
-        task_count = cursor.fetchone()[0]
-
-        conn.execute(
-            """
-            UPDATE array_jobs
-            SET total_tasks = ?, last_updated = ?
-            WHERE array_job_id = ? AND hostname = ?
-            """,
-            (task_count, now.isoformat(), array_job_id, hostname),
-        )
-
-        # Recalculate state statistics
-        self._recalculate_array_stats(conn, array_job_id, hostname)
-
-        logger.debug(
-            f"Updated array metadata for {array_job_id} on {hostname}: {task_count} tasks"
-        )
-
-    def _recalculate_array_stats(self, conn, array_job_id: str, hostname: str):
-        """Recalculate and update state statistics for an array job."""
-        now = datetime.now()
-
-        # Get state counts from actual tasks
-        cursor = conn.execute(
-            """
-            SELECT
-                json_extract(job_info_json, '$.state') as state,
-                COUNT(*) as count
-            FROM cached_jobs
-            WHERE array_job_id = ? AND hostname = ?
-              AND job_id NOT LIKE '%[%'
-            GROUP BY state
-            """,
-            (array_job_id, hostname),
-        )
-
-        state_counts = {row[0]: row[1] for row in cursor.fetchall()}
-
-        # Clear existing stats
         conn.execute(
-            """
-            DELETE FROM array_task_stats
-            WHERE array_job_id = ? AND hostname = ?
-            """,
-            (array_job_id, hostname),
+            _UPSERT_ARRAY_JOB_SQL,
+            {
+                "array_job_id": array_job_id,
+                "hostname": hostname,
+                "job_name": job_info.name,
+                "user": job_info.user,
+                "script_content": script_content,
+                "submit_time": job_info.submit_time,
+                "partition": job_info.partition,
+                "account": job_info.account,
+                "work_dir": job_info.work_dir,
+                "now": now_iso or datetime.now().isoformat(),
+            },
         )
 
-        # Insert updated stats
-        for state, count in state_counts.items():
-            conn.execute(
-                """
-                INSERT INTO array_task_stats
-                (array_job_id, hostname, state, count, last_updated)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (array_job_id, hostname, state, count, now.isoformat()),
-            )
+        logger.debug(f"Updated array metadata for {array_job_id} on {hostname}")
 
     def get_array_job_metadata(
         self, array_job_id: str, hostname: str
@@ -1056,10 +1798,10 @@ class JobDataCache:
             List of JobInfo objects for array tasks
         """
         with self._get_connection() as conn:
-            query = """
+            query = f"""
                 SELECT job_info_json FROM cached_jobs
                 WHERE array_job_id = ? AND hostname = ?
-                  AND job_id NOT LIKE '%[%'
+                  AND {_ARRAY_TASK_CLAUSE}
                 ORDER BY job_id
             """
             params = [array_job_id, hostname]
@@ -1070,16 +1812,42 @@ class JobDataCache:
 
             cursor = conn.execute(query, params)
 
+            # Large arrays are decoded one batch at a time, one JSON parse
+            # per batch, rather than materializing every row up front
             jobs = []
-            for row in cursor.fetchall():
-                try:
-                    job_dict = json.loads(row["job_info_json"])
-                    jobs.append(self._deserialize_job_info(job_dict))
-                except Exception as e:
-                    logger.warning(f"Failed to parse array task: {e}")
+            while batch := cursor.fetchmany(_FETCH_BATCH_SIZE):
+                for job_dict in _decode_job_info_batch([row[0] for row in batch]):
+                    if job_dict is None:
+                        continue
+                    try:
+                        jobs.append(self._deserialize_job_info(job_dict, trusted=True))
+                    except Exception as e:
+                        logger.warning(f"Failed to parse array task: {e}")
 
             return jobs
 
+    def get_array_task_ids(self, array_job_id: str, hostname: str) -> List[str]:
+        """Get the job IDs of an array's tasks without decoding their JobInfo.
+
+        Args:
+            array_job_id: The array job ID
+            hostname: Hostname
+
+        Returns:
+            Task job IDs in the same order as get_array_tasks
+        """
+        with self._get_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                SELECT job_id FROM cached_jobs
+                WHERE array_job_id = ? AND hostname = ?
+                  AND {_ARRAY_TASK_CLAUSE}
+                ORDER BY job_id
+                """,
+                (array_job_id, hostname),
+            )
+            return [row["job_id"] for row in cursor.fetchall()]
+
     def get_cached_job(
         self,
         job_id: str,
@@ -1101,38 +1869,104 @@ class JobDataCache:
         if max_age_days is None:
             max_age_days = self.cache_settings.recycled_id_max_age_days
 
-        cache_cutoff = self._get_cache_cutoff_iso(max_age_days)
-        submit_time_cutoff = self._get_submit_time_cutoff(max_age_days)
-
         with self._get_connection() as conn:
-            query = "SELECT * FROM cached_jobs WHERE job_id = ?"
-            params: List[Any] = [job_id]
-            if hostname:
-                query += " AND hostname = ?"
-                params.append(hostname)
-            if cache_cutoff:
-                query += " AND cached_at >= ?"
-                params.append(cache_cutoff)
-            cursor = conn.execute(query, params)
-
-            row = cursor.fetchone()
-            if row:
-                cached_data = self._row_to_cached_data(row)
-
-                # Validate that the cached job isn't too old (likely a recycled ID)
-                if cached_data.job_info and cached_data.job_info.submit_time:
-                    if self._is_submit_time_older_than_cutoff(
-                        cached_data.job_info.submit_time, submit_time_cutoff
-                    ):
-                        logger.debug(
-                            f"Ignoring stale cached job {job_id} on {hostname} "
-                            f"(>{max_age_days} days old)"
-                        )
-                        return None
+            # Reuse a recent decode of the same lookup while the database is
+            # unchanged. Inside a transaction the data may still be rolled
+            # back, so those lookups always go to SQLite.
+            memo = self._local.row_memo
+            memo_key = (job_id, hostname, max_age_days)
+            cacheable = not conn.in_transaction
+            if cacheable:
+                stamp = (
+                    conn.execute("PRAGMA data_version").fetchone()[0],
+                    conn.total_changes,
+                )
+                if stamp != self._local.row_memo_stamp:
+                    # Every entry predates the change; free them now rather
+                    # than leaving them for LRU eviction
+                    memo.clear()
+                    self._local.row_memo_stamp = stamp
+                hit = memo.get(memo_key)
+                if hit is not None and time.monotonic() - hit[0] < _ROW_MEMO_TTL:
+                    cached_data = self._with_output_blobs(conn, hit[1], hit[2])
+                    if cached_data is not None:
+                        memo.move_to_end(memo_key)
+                        return cached_data
+
+            cached_data = self._query_cached_job(conn, job_id, hostname, max_age_days)
+
+            if cacheable:
+                # Output blobs are left out of the memo and re-read on a hit,
+                # so memory is bounded by the decoded rows alone
+                has_outputs = cached_data is not None and (
+                    cached_data.stdout_compressed is not None
+                    or cached_data.stderr_compressed is not None
+                )
+                memo[memo_key] = (
+                    time.monotonic(),
+                    _strip_output_blobs(cached_data),
+                    has_outputs,
+                )
+                memo.move_to_end(memo_key)
+                if len(memo) > _ROW_MEMO_SIZE:
+                    memo.popitem(last=False)
+            return _copy_cached_data(cached_data)
 
-                return cached_data
+    def _with_output_blobs(
+        self,
+        conn: sqlite3.Connection,
+        cached_data: Optional[CachedJobData],
+        has_outputs: bool,
+    ) -> Optional[CachedJobData]:
+        """Copy a memoized entry, reading back the output blobs it left out.
 
+        Returns None if the row has gone, so the caller falls back to a full
+        lookup.
+        """
+        cached_copy = _copy_cached_data(cached_data)
+        if cached_copy is None or not has_outputs:
+            return cached_copy
+
+        row = conn.execute(
+            "SELECT stdout_compressed, stderr_compressed FROM cached_jobs "
+            "WHERE job_id = ? AND hostname = ?",
+            (cached_copy.job_id, cached_copy.hostname),
+        ).fetchone()
+        if row is None:
             return None
+        cached_copy.stdout_compressed, cached_copy.stderr_compressed = row
+        return cached_copy
+
+    def _query_cached_job(
+        self,
+        conn: sqlite3.Connection,
+        job_id: str,
+        hostname: Optional[str],
+        max_age_days: int,
+    ) -> Optional[CachedJobData]:
+        """Load and age-check a single cached job row."""
+        cache_cutoff = self._get_cache_cutoff_iso(max_age_days)
+        submit_time_cutoff = self._get_submit_time_cutoff(max_age_days)
+
+        query = f"SELECT {_CACHED_JOB_COLUMNS} FROM cached_jobs WHERE job_id = ?"
+        params: List[Any] = [job_id]
+        if hostname:
+            query += " AND hostname = ?"
+            params.append(hostname)
+        if cache_cutoff:
+            query += " AND cached_at >= ?"
+            params.append(cache_cutoff)
+        if submit_time_cutoff:
+            # Skip rows that are too old to be this job (likely a recycled ID)
+            query += _SUBMIT_TIME_FRESH_CLAUSE
+            params.append(submit_time_cutoff)
+        cursor = conn.execute(query, params)
+
+        row = cursor.fetchone()
+        if row:
+            return self._row_to_cached_data(row)
+
+        return None
 
     def get_cached_jobs_by_ids(
         self,
@@ -1154,47 +1988,34 @@ class JobDataCache:
         submit_time_cutoff = self._get_submit_time_cutoff(max_age_days)
 
         # SQLite has a limit on variables; chunk to stay under it.
-        chunk_size = 500
-        skipped_stale: List[str] = []
+        chunk_size = 512
         with self._get_connection() as conn:
             for i in range(0, len(job_ids), chunk_size):
-                chunk = job_ids[i : i + chunk_size]
-                placeholders = ",".join(["?"] * len(chunk))
+                chunk = _pad_chunk(list(job_ids[i : i + chunk_size]))
+                placeholders = _in_placeholders(len(chunk))
                 if hostname:
                     query = (
-                        f"SELECT * FROM cached_jobs WHERE job_id IN ({placeholders}) "
+                        f"SELECT {_CACHED_JOB_COLUMNS} FROM cached_jobs "
+                        f"WHERE job_id IN ({placeholders}) "
                         "AND hostname = ?"
                     )
                     params = [*chunk, hostname]
                 else:
                     query = (
-                        f"SELECT * FROM cached_jobs WHERE job_id IN ({placeholders})"
+                        f"SELECT {_CACHED_JOB_COLUMNS} FROM cached_jobs "
+                        f"WHERE job_id IN ({placeholders})"
                     )
                     params = [*chunk]
                 if cache_cutoff:
                     query += " AND cached_at >= ?"
                     params.append(cache_cutoff)
+                if submit_time_cutoff:
+                    query += _SUBMIT_TIME_FRESH_CLAUSE
+                    params.append(submit_time_cutoff)
 
-                cursor = conn.execute(query, params)
-                rows = cursor.fetchall()
-                for row in rows:
+                for row in conn.execute(query, params):
                     cached_data = self._row_to_cached_data(row)
-                    job_id = cached_data.job_id
-
-                    # Validate age to avoid recycled IDs
-                    if cached_data.job_info and cached_data.job_info.submit_time:
-                        if self._is_submit_time_older_than_cutoff(
-                            cached_data.job_info.submit_time, submit_time_cutoff
-                        ):
-                            skipped_stale.append(job_id)
-                            continue
-
-                    results[job_id] = cached_data
-
-        if skipped_stale:
-            logger.debug(
-                f"Skipped {len(skipped_stale)} stale cached jobs (>{max_age_days} days old)"
-            )
+                    results[cached_data.job_id] = cached_data
 
         return results
 
@@ -1204,45 +2025,12 @@ class JobDataCache:
             return None
         return (datetime.now() - timedelta(days=max_age_days)).isoformat()
 
-    def _get_submit_time_cutoff(
-        self, max_age_days: Optional[int]
-    ) -> Optional[datetime]:
-        """Return submit_time cutoff (UTC) for recycled-ID validation."""
+    def _get_submit_time_cutoff(self, max_age_days: Optional[int]) -> Optional[str]:
+        """Return the submit_time cutoff in the column's UTC datetime() format."""
         if max_age_days is None or max_age_days <= 0:
             return None
-        from datetime import timezone
-
-        return datetime.now(timezone.utc) - timedelta(days=max_age_days)
-
-    def _is_submit_time_older_than_cutoff(
-        self, submit_time: Any, cutoff: Optional[datetime]
-    ) -> bool:
-        """Check whether submit_time is older than the provided UTC cutoff."""
-        if not submit_time or cutoff is None:
-            return False
-
-        from datetime import timezone
-
-        parsed_submit_time: Optional[datetime]
-        if isinstance(submit_time, str):
-            try:
-                parsed_submit_time = datetime.fromisoformat(
-                    submit_time.replace("Z", "+00:00")
-                )
-            except ValueError:
-                logger.debug(f"Failed to parse cached submit_time: {submit_time}")
-                return False
-        elif isinstance(submit_time, datetime):
-            parsed_submit_time = submit_time
-        else:
-            return False
-
-        if parsed_submit_time.tzinfo is None:
-            parsed_submit_time = parsed_submit_time.replace(tzinfo=timezone.utc)
-        else:
-            parsed_submit_time = parsed_submit_time.astimezone(timezone.utc)
-
-        return parsed_submit_time < cutoff
+        cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+        return cutoff.strftime(_SUBMIT_TIME_FORMAT)
 
     def get_cached_jobs(
         self,
@@ -1250,6 +2038,8 @@ class JobDataCache:
         active_only: bool = False,
         limit: Optional[int] = None,
         since: Optional[datetime] = None,
+        user: Optional[str] = None,
+        include_outputs: bool = True,
     ) -> List[CachedJobData]:
         """
         Get list of cached jobs with optional filtering.
@@ -1259,73 +2049,120 @@ class JobDataCache:
             active_only: If True, only return active jobs
             limit: Optional limit on number of results
             since: Optional datetime to filter jobs submitted after this time (assumed UTC)
+            user: Optional job owner filter (rows for other users are never parsed)
+            include_outputs: If False, the compressed stdout/stderr blobs are not
+                read and come back as None (sizes and codecs are still set)
 
         Returns:
             List of CachedJobData objects
         """
-        with self._get_connection() as conn:
-            query = "SELECT * FROM cached_jobs WHERE 1=1"
-            params = []
-
-            if hostname:
-                query += " AND hostname = ?"
-                params.append(hostname)
-
-            if active_only:
-                query += " AND is_active = 1"
-
-            if since:
-                # Filter by submit time if available in the JSON
-                # Strip timezone for comparison with stored times (which have no timezone)
-                since_for_comparison = (
-                    since.replace(tzinfo=None) if since.tzinfo else since
-                )
-                query += " AND datetime(json_extract(job_info_json, '$.submit_time')) > datetime(?)"
-                params.append(since_for_comparison.isoformat())
-
-            query += " ORDER BY last_updated DESC"
-
-            if limit:
-                query += " LIMIT ?"
-                params.append(limit)
+        query = _cached_jobs_query(
+            bool(hostname), active_only, bool(user), since is not None, include_outputs
+        )
+        params = [*_cached_jobs_params(hostname, user, since), limit or -1]
 
+        jobs = []
+        with self._get_connection() as conn:
             cursor = conn.execute(query, params)
-            return [self._row_to_cached_data(row) for row in cursor.fetchall()]
+            while rows := cursor.fetchmany(_FETCH_BATCH_SIZE):
+                jobs.extend(self._row_to_cached_data(row[:-1]) for row in rows)
+        return jobs
 
-    def _row_to_cached_data(self, row: sqlite3.Row) -> CachedJobData:
-        """Convert database row to CachedJobData."""
-        job_info_dict = json.loads(row["job_info_json"])
+    def iter_cached_jobs(
+        self,
+        hostname: Optional[str] = None,
+        active_only: bool = False,
+        limit: Optional[int] = None,
+        since: Optional[datetime] = None,
+        user: Optional[str] = None,
+        include_outputs: bool = True,
+    ) -> Iterator[CachedJobData]:
+        """Yield cached jobs one at a time; same filters as get_cached_jobs.
+
+        Rows are read in pages, each with its own short read resuming after the
+        (last_updated, rowid) key of the previous page, so nothing is held open
+        on this thread's connection while the caller works between pages, and
+        callers that stop early never parse the rest of the result set.
+        """
+        first_query = _cached_jobs_query(
+            bool(hostname), active_only, bool(user), since is not None, include_outputs
+        )
+        next_query = _cached_jobs_query(
+            bool(hostname),
+            active_only,
+            bool(user),
+            since is not None,
+            include_outputs,
+            after_key=True,
+        )
+        filter_params = _cached_jobs_params(hostname, user, since)
+
+        remaining = limit
+        key: Optional[Tuple[str, int]] = None
+        while remaining is None or remaining > 0:
+            page_size = (
+                _FETCH_BATCH_SIZE
+                if remaining is None
+                else min(_FETCH_BATCH_SIZE, remaining)
+            )
+            with self._get_connection() as conn:
+                if key is None:
+                    rows = conn.execute(
+                        first_query, (*filter_params, page_size)
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        next_query, (*filter_params, *key, page_size)
+                    ).fetchall()
+            for row in rows:
+                yield self._row_to_cached_data(row[:-1])
+            if len(rows) < page_size:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+            key = (rows[-1]["last_updated"], rows[-1][-1])
 
-        job_info = self._deserialize_job_info(job_info_dict)
-        is_active = bool(row["is_active"])
+    def _row_to_cached_data(self, row: sqlite3.Row) -> CachedJobData:
+        """Convert a row of _CACHED_JOB_COLUMNS to CachedJobData."""
+        (
+            job_id,
+            hostname,
+            job_info_json,
+            script_content,
+            local_source_dir,
+            stdout_compressed,
+            stdout_size,
+            stdout_compression,
+            stderr_compressed,
+            stderr_size,
+            stderr_compression,
+            cached_at,
+            last_updated,
+            is_active,
+        ) = row
+
+        job_info = self._deserialize_job_info(_loads_json(job_info_json), trusted=True)
+        is_active = bool(is_active)
 
         # Defensive normalization for historical cache corruption:
         # inactive entries should never retain active PD/R states.
-        if (not is_active) and job_info.state in [JobState.PENDING, JobState.RUNNING]:
+        if (not is_active) and job_info.state in _ACTIVE_JOB_STATES:
             job_info.state = JobState.UNKNOWN
 
-        # Handle optional local_source_dir column for existing DBs
-        local_source_dir = None
-        try:
-            local_source_dir = row["local_source_dir"]
-        except (KeyError, IndexError):
-            # Column doesn't exist in older databases
-            pass
-
         return CachedJobData(
-            job_id=row["job_id"],
-            hostname=row["hostname"],
+            job_id=job_id,
+            hostname=hostname,
             job_info=job_info,
-            script_content=row["script_content"],
+            script_content=script_content,
             local_source_dir=local_source_dir,
-            stdout_compressed=row["stdout_compressed"],
-            stdout_size=row["stdout_size"],
-            stdout_compression=row["stdout_compression"],
-            stderr_compressed=row["stderr_compressed"],
-            stderr_size=row["stderr_size"],
-            stderr_compression=row["stderr_compression"],
-            cached_at=datetime.fromisoformat(row["cached_at"]),
-            last_updated=datetime.fromisoformat(row["last_updated"]),
+            stdout_compressed=stdout_compressed,
+            stdout_size=stdout_size,
+            stdout_compression=stdout_compression,
+            stderr_compressed=stderr_compressed,
+            stderr_size=stderr_size,
+            stderr_compression=stderr_compression,
+            cached_at=datetime.fromisoformat(cached_at),
+            last_updated=datetime.fromisoformat(last_updated),
             is_active=is_active,
         )
 
@@ -1347,86 +2184,63 @@ class JobDataCache:
             stderr_data: Dict with compressed stderr data and metadata
             mark_fetched_after_completion: If True, mark outputs as fetched after job completion
         """
-        import base64
-        import gzip
-
-        with self._get_connection() as conn:
-            updates = []
-            params = []
-
-            if stdout_data is not None:
-                # Decode base64 and store as BLOB
-                compressed_data = base64.b64decode(stdout_data["data"])
-
-                # Further compress if not already compressed and large enough
-                if not stdout_data.get("compressed") and len(compressed_data) > 1024:
-                    compressed_data = gzip.compress(compressed_data)
-                    compression = "gzip"
-                else:
-                    compression = stdout_data.get("compression", "none")
-
-                updates.extend(
-                    [
-                        "stdout_compressed = ?",
-                        "stdout_size = ?",
-                        "stdout_compression = ?",
-                    ]
-                )
-                params.extend(
-                    [compressed_data, stdout_data.get("original_size", 0), compression]
-                )
-
-                if mark_fetched_after_completion:
-                    updates.append("stdout_fetched_after_completion = 1")
-
-            if stderr_data is not None:
-                # Decode base64 and store as BLOB
-                compressed_data = base64.b64decode(stderr_data["data"])
+        self._store_compressed_outputs(
+            job_id,
+            hostname,
+            stdout=_decode_output_payload(stdout_data),
+            stderr=_decode_output_payload(stderr_data),
+            mark_fetched_after_completion=mark_fetched_after_completion,
+        )
 
-                # Further compress if not already compressed and large enough
-                if not stderr_data.get("compressed") and len(compressed_data) > 1024:
-                    compressed_data = gzip.compress(compressed_data)
-                    compression = "gzip"
-                else:
-                    compression = stderr_data.get("compression", "none")
-
-                updates.extend(
-                    [
-                        "stderr_compressed = ?",
-                        "stderr_size = ?",
-                        "stderr_compression = ?",
-                    ]
-                )
-                params.extend(
-                    [compressed_data, stderr_data.get("original_size", 0), compression]
-                )
+    def _store_compressed_outputs(
+        self,
+        job_id: str,
+        hostname: str,
+        stdout: Optional[Tuple[bytes, int, str]] = None,
+        stderr: Optional[Tuple[bytes, int, str]] = None,
+        mark_fetched_after_completion: bool = False,
+    ):
+        """Write ready-to-store output blobs as (data, original_size, codec)."""
+        updates = []
+        params: List[Any] = []
+        for stream, output in (("stdout", stdout), ("stderr", stderr)):
+            if output is None:
+                continue
+            updates.extend(
+                [
+                    f"{stream}_compressed = ?",
+                    f"{stream}_size = ?",
+                    f"{stream}_compression = ?",
+                ]
+            )
+            params.extend(output)
+            if mark_fetched_after_completion:
+                updates.append(f"{stream}_fetched_after_completion = 1")
 
-                if mark_fetched_after_completion:
-                    updates.append("stderr_fetched_after_completion = 1")
+        if not updates:
+            return
 
-            if updates:
-                updates.append("last_updated = ?")
-                params.append(datetime.now().isoformat())
-                params.extend([job_id, hostname])
+        updates.append("last_updated = ?")
+        params.append(datetime.now().isoformat())
+        params.extend([job_id, hostname])
 
-                query = f"""
-                    UPDATE cached_jobs 
-                    SET {", ".join(updates)}
-                    WHERE job_id = ? AND hostname = ?
-                """
-                conn.execute(query, params)
-                conn.commit()
+        query = f"""
+            UPDATE cached_jobs 
+            SET {", ".join(updates)}
+            WHERE job_id = ? AND hostname = ?
+        """
+        with self._get_connection() as conn:
+            conn.execute(query, params)
+            conn.commit()
 
-                logger.debug(
-                    f"Updated compressed outputs for job {job_id} on {hostname}"
-                )
+        logger.debug(f"Updated compressed outputs for job {job_id} on {hostname}")
 
     def update_job_outputs(
         self,
         job_id: str,
         hostname: str,
-        stdout_content: Optional[str] = None,
-        stderr_content: Optional[str] = None,
+        stdout_content: Optional[Union[str, bytes]] = None,
+        stderr_content: Optional[Union[str, bytes]] = None,
         mark_fetched_after_completion: bool = False,
     ):
         """
@@ -1436,65 +2250,15 @@ class JobDataCache:
         Args:
             job_id: Job ID
             hostname: Hostname
-            stdout_content: Updated stdout content (plain text)
-            stderr_content: Updated stderr content (plain text)
+            stdout_content: Updated stdout content (text, or UTF-8 bytes as read)
+            stderr_content: Updated stderr content (text, or UTF-8 bytes as read)
             mark_fetched_after_completion: If True, mark outputs as fetched after job completion
         """
-        import base64
-        import gzip
-
-        # Convert text content to compressed format
-        stdout_data = None
-        stderr_data = None
-
-        if stdout_content is not None:
-            # Compress if large enough
-            if len(stdout_content) > 1024:
-                compressed = gzip.compress(stdout_content.encode("utf-8"))
-                stdout_data = {
-                    "compressed": True,
-                    "data": base64.b64encode(compressed).decode("ascii"),
-                    "original_size": len(stdout_content),
-                    "compression": "gzip",
-                }
-            else:
-                # Store uncompressed for small content
-                stdout_data = {
-                    "compressed": False,
-                    "data": base64.b64encode(stdout_content.encode("utf-8")).decode(
-                        "ascii"
-                    ),
-                    "original_size": len(stdout_content),
-                    "compression": "none",
-                }
-
-        if stderr_content is not None:
-            # Compress if large enough
-            if len(stderr_content) > 1024:
-                compressed = gzip.compress(stderr_content.encode("utf-8"))
-                stderr_data = {
-                    "compressed": True,
-                    "data": base64.b64encode(compressed).decode("ascii"),
-                    "original_size": len(stderr_content),
-                    "compression": "gzip",
-                }
-            else:
-                # Store uncompressed for small content
-                stderr_data = {
-                    "compressed": False,
-                    "data": base64.b64encode(stderr_content.encode("utf-8")).decode(
-                        "ascii"
-                    ),
-                    "original_size": len(stderr_content),
-                    "compression": "none",
-                }
-
-        # Call the compressed version
-        self.update_job_outputs_compressed(
-            job_id=job_id,
-            hostname=hostname,
-            stdout_data=stdout_data,
-            stderr_data=stderr_data,
+        self._store_compressed_outputs(
+            job_id,
+            hostname,
+            stdout=_encode_output(stdout_content),
+            stderr=_encode_output(stderr_content),
             mark_fetched_after_completion=mark_fetched_after_completion,
         )
 
@@ -1513,42 +2277,25 @@ class JobDataCache:
             hostname: Hostname
             script_content: Script content to cache
         """
-        with self._get_connection() as conn:
-            cursor = conn.execute(
-                "SELECT COUNT(*) as count FROM cached_jobs WHERE job_id = ? AND hostname = ?",
-                (job_id, hostname),
-            )
-            exists = cursor.fetchone()["count"] > 0
-
-            if exists:
-                conn.execute(
-                    """
-                    UPDATE cached_jobs 
-                    SET script_content = ?, last_updated = ?
-                    WHERE job_id = ? AND hostname = ?
-                    """,
-                    (script_content, datetime.now().isoformat(), job_id, hostname),
-                )
-            else:
-                from .models.job import JobInfo, JobState
-
-                minimal_job_info = JobInfo(
-                    job_id=job_id,
-                    name=f"job_{job_id}",
-                    state=JobState.PENDING,
-                    hostname=hostname,
-                )
-
-                cached_data = CachedJobData(
-                    job_id=job_id,
-                    hostname=hostname,
-                    job_info=minimal_job_info,
-                    script_content=script_content,
-                    is_active=True,
-                )
-
-                self._store_cached_data(cached_data)
+        # The placeholder row is only used when the job is not cached yet;
+        # an existing row just gets the new script
+        minimal_job_info = JobInfo(
+            job_id=job_id,
+            name=f"job_{job_id}",
+            state=JobState.PENDING,
+            hostname=hostname,
+        )
+        cached_data = CachedJobData(
+            job_id=job_id,
+            hostname=hostname,
+            job_info=minimal_job_info,
+            script_content=script_content,
+            is_active=True,
+        )
+        params = self._cached_job_params(cached_data, preserve_existing=False)
 
+        with self._get_connection() as conn:
+            conn.execute(_UPSERT_JOB_SCRIPT_SQL, params)
             conn.commit()
 
     def store_run_manifest(
@@ -1562,9 +2309,13 @@ class JobDataCache:
         with self._get_connection() as conn:
             conn.execute(
                 """
-                INSERT OR REPLACE INTO run_manifests
+                INSERT INTO run_manifests
                 (job_id, hostname, manifest_version, manifest_json, created_at)
                 VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(job_id, hostname) DO UPDATE SET
+                    manifest_version = excluded.manifest_version,
+                    manifest_json = excluded.manifest_json,
+                    created_at = excluded.created_at
                 """,
                 (
                     job_id,
@@ -1598,16 +2349,23 @@ class JobDataCache:
 
     def mark_job_completed(self, job_id: str, hostname: str):
         """Mark a job as no longer active (completed/failed/cancelled)."""
-        with self._get_connection() as conn:
-            conn.execute(
+        self.mark_jobs_completed([(job_id, hostname)])
+
+    def mark_jobs_completed(self, keys: List[Tuple[str, str]]):
+        """Mark many (job_id, hostname) pairs as no longer active in one commit."""
+        if not keys:
+            return
+
+        now = datetime.now().isoformat()
+        with self._write_tx() as conn:
+            conn.executemany(
                 """
                 UPDATE cached_jobs 
                 SET is_active = 0, last_updated = ?
                 WHERE job_id = ? AND hostname = ?
             """,
-                (datetime.now().isoformat(), job_id, hostname),
+                [(now, job_id, hostname) for job_id, hostname in keys],
             )
-            conn.commit()
 
     def check_outputs_fetched_after_completion(
         self, job_id: str, hostname: str
@@ -1720,43 +2478,45 @@ class JobDataCache:
 
             cursor = conn.execute(query, params)
             deleted_count = cursor.rowcount
+            self._analyze_if_stale(conn)
             conn.commit()
 
             if deleted_count > 0:
+                self._incremental_vacuum(conn)
                 logger.info(f"Cleaned up {deleted_count} old cache entries")
 
             return deleted_count
 
+    def _used_size_mb(self, conn: sqlite3.Connection) -> float:
+        """Return the size of the database pages in use, free list excluded."""
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - free_pages) * page_size / (1024 * 1024)
+
+    def _incremental_vacuum(self, conn: sqlite3.Connection, pages: int = 1000):
+        """Return up to ``pages`` free pages to the filesystem.
+
+        A no-op on databases created before auto_vacuum=INCREMENTAL was set.
+        """
+        try:
+            # The pragma frees one page per step; executescript runs it to
+            # completion where execute() would stop after the first step.
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+        except sqlite3.Error as e:
+            logger.debug(f"Incremental vacuum failed: {e}")
+
     def _generate_cache_key(self, hostname: str, filters: Dict[str, Any]) -> str:
         """Generate a unique cache key for a query."""
         filter_str = json.dumps(filters, sort_keys=True)
         key_source = f"{hostname}:{filter_str}"
-        return hashlib.sha256(key_source.encode()).hexdigest()[:16]
+        # Not security-sensitive; blake2b yields the same 16 hex chars cheaper
+        return hashlib.blake2b(key_source.encode(), digest_size=8).hexdigest()
 
     def _parse_since_to_dates(self, since: str) -> Tuple[datetime, datetime]:
         """Parse 'since' parameter to date range."""
         end_date = datetime.now()
-        import re
-
-        match = re.match(r"^(\d+)([hdwm])$", since)
-        if not match:
-            start_date = end_date - timedelta(days=1)
-        else:
-            value = int(match.group(1))
-            unit = match.group(2)
-
-            if unit == "h":
-                start_date = end_date - timedelta(hours=value)
-            elif unit == "d":
-                start_date = end_date - timedelta(days=value)
-            elif unit == "w":
-                start_date = end_date - timedelta(weeks=value)
-            elif unit == "m":
-                start_date = end_date - timedelta(days=value * 30)
-            else:
-                start_date = end_date - timedelta(days=1)
-
-        return start_date, end_date
+        return end_date - _since_to_timedelta(since), end_date
 
     def check_date_range_cache(
         self, hostname: str, filters: Dict[str, Any], since: Optional[str] = None
@@ -1772,44 +2532,36 @@ class JobDataCache:
         cache_key = self._generate_cache_key(hostname, filters)
         requested_start, requested_end = self._parse_since_to_dates(since)
 
-        with self._get_connection() as conn:
-            cursor = conn.execute(
-                """
-                SELECT job_ids_json, cached_at, hit_count
-                FROM cached_job_ranges
-                WHERE hostname = ?
-                  AND cache_key = ?
-                  AND start_date <= ?
-                  AND end_date >= ?
-                  AND expires_at > ?
-                ORDER BY cached_at DESC
-                LIMIT 1
-            """,
-                (
-                    hostname,
-                    cache_key,
-                    requested_start.isoformat(),
-                    requested_end.isoformat(),
-                    datetime.now().isoformat(),
-                ),
-            )
+        params = (
+            cache_key,
+            hostname,
+            requested_start.isoformat(),
+            requested_end.isoformat(),
+            datetime.now().isoformat(),
+        )
 
-            row = cursor.fetchone()
-            if row:
-                conn.execute(
-                    """
-                    UPDATE cached_job_ranges
-                    SET hit_count = hit_count + 1
-                    WHERE cache_key = ?
-                """,
-                    (cache_key,),
-                )
+        with self._get_connection() as conn:
+            if _SQLITE_HAS_RETURNING:
+                # Count the hit and read the entry in one statement; drain it
+                # so the UPDATE has finished before the commit
+                rows = conn.execute(_RANGE_CACHE_HIT_SQL, params).fetchall()
                 conn.commit()
+                row = rows[0] if rows else None
+            else:
+                row = conn.execute(_RANGE_CACHE_LOOKUP_SQL, params).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE cached_job_ranges SET hit_count = hit_count + 1 "
+                        "WHERE cache_key = ?",
+                        (cache_key,),
+                    )
+                    conn.commit()
 
-                job_ids = json.loads(row["job_ids_json"])
+            if row:
+                job_ids = _loads_json(row["job_ids_json"])
                 logger.debug(
                     f"Date range cache HIT for {hostname}: {len(job_ids)} jobs "
-                    f"(hit #{row['hit_count'] + 1})"
+                    f"(hit #{row['hit_count']})"
                 )
                 return job_ids
 
@@ -1833,10 +2585,19 @@ class JobDataCache:
 
             conn.execute(
                 """
-                INSERT OR REPLACE INTO cached_job_ranges
+                INSERT INTO cached_job_ranges
                 (cache_key, hostname, start_date, end_date, filters_json,
                  job_ids_json, cached_at, expires_at, hit_count)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    hostname = excluded.hostname,
+                    start_date = excluded.start_date,
+                    end_date = excluded.end_date,
+                    filters_json = excluded.filters_json,
+                    job_ids_json = excluded.job_ids_json,
+                    cached_at = excluded.cached_at,
+                    expires_at = excluded.expires_at,
+                    hit_count = 0
             """,
                 (
                     cache_key,
@@ -1844,7 +2605,7 @@ class JobDataCache:
                     start_date.isoformat(),
                     end_date.isoformat(),
                     json.dumps(filters),
-                    json.dumps(job_ids),
+                    _dumps_json(job_ids),
                     now.isoformat(),
                     expires_at.isoformat(),
                 ),
@@ -1881,12 +2642,23 @@ class JobDataCache:
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         with self._get_connection() as conn:
-            cursor = conn.execute("SELECT COUNT(*) as total FROM cached_jobs")
-            total = cursor.fetchone()["total"]
-            cursor = conn.execute(
-                "SELECT COUNT(*) as active FROM cached_jobs WHERE is_active = 1"
-            )
-            active = cursor.fetchone()["active"]
+            # One pass over cached_jobs for all the counters
+            cursor = conn.execute("""
+                SELECT
+                    COUNT(*) as total,
+                    SUM(CASE WHEN is_active = 1 THEN 1 ELSE 0 END) as active,
+                    SUM(CASE WHEN script_content IS NOT NULL THEN 1 ELSE 0 END)
+                        as with_scripts,
+                    SUM(CASE WHEN stdout_compressed IS NOT NULL THEN 1 ELSE 0 END)
+                        as with_stdout
+                FROM cached_jobs
+            """)
+            counts = cursor.fetchone()
+            total = counts["total"]
+            # SUM() is NULL on an empty table
+            active = counts["active"] or 0
+            with_scripts = counts["with_scripts"] or 0
+            with_stdout = counts["with_stdout"] or 0
             cursor = conn.execute("""
                 SELECT hostname, COUNT(*) as count 
                 FROM cached_jobs 
@@ -1894,30 +2666,14 @@ class JobDataCache:
                 ORDER BY count DESC
             """)
             by_hostname = {row["hostname"]: row["count"] for row in cursor.fetchall()}
-            cursor = conn.execute(
-                "SELECT COUNT(*) as with_scripts FROM cached_jobs WHERE script_content IS NOT NULL"
-            )
-            with_scripts = cursor.fetchone()["with_scripts"]
-
-            cursor = conn.execute(
-                "SELECT COUNT(*) as with_stdout FROM cached_jobs WHERE stdout_compressed IS NOT NULL"
-            )
-            with_stdout = cursor.fetchone()["with_stdout"]
-            cursor = conn.execute(
-                """
-                SELECT 
-                    COUNT(*) as total_ranges,
-                    SUM(hit_count) as total_hits,
-                    AVG(hit_count) as avg_hits_per_range
-                FROM cached_job_ranges
-                WHERE expires_at > ?
-            """,
-                (datetime.now().isoformat(),),
-            )
-            range_stats = cursor.fetchone()
+            # Live-range aggregates ride along on the top-5 rows as window
+            # aggregates, so cached_job_ranges is scanned once
             cursor = conn.execute(
                 """
-                SELECT hostname, filters_json, hit_count, cached_at
+                SELECT hostname, filters_json, hit_count, cached_at,
+                    COUNT(*) OVER () as total_ranges,
+                    SUM(hit_count) OVER () as total_hits,
+                    AVG(hit_count) OVER () as avg_hits_per_range
                 FROM cached_job_ranges
                 WHERE expires_at > ?
                 ORDER BY hit_count DESC
@@ -1925,14 +2681,16 @@ class JobDataCache:
             """,
                 (datetime.now().isoformat(),),
             )
+            rows = cursor.fetchall()
+            range_stats = rows[0] if rows else None
             top_ranges = [
                 {
                     "hostname": row["hostname"],
-                    "filters": json.loads(row["filters_json"]),
+                    "filters": _loads_json(row["filters_json"]),
                     "hits": row["hit_count"],
                     "cached_at": row["cached_at"],
                 }
-                for row in cursor.fetchall()
+                for row in rows
             ]
 
             return {
@@ -1947,9 +2705,11 @@ class JobDataCache:
                 if self.db_path.exists()
                 else 0,
                 "date_range_cache": {
-                    "active_ranges": range_stats["total_ranges"] or 0,
-                    "total_hits": range_stats["total_hits"] or 0,
-                    "avg_hits_per_range": float(range_stats["avg_hits_per_range"] or 0),
+                    "active_ranges": range_stats["total_ranges"] if range_stats else 0,
+                    "total_hits": range_stats["total_hits"] if range_stats else 0,
+                    "avg_hits_per_range": float(range_stats["avg_hits_per_range"])
+                    if range_stats
+                    else 0.0,
                     "top_ranges": top_ranges,
                 },
             }
@@ -1969,9 +2729,35 @@ class JobDataCache:
         enabled: bool = True,
     ) -> None:
         """Insert or update a notification device registration."""
+        self.upsert_notification_devices(
+            [
+                {
+                    "api_key_hash": api_key_hash,
+                    "device_token": device_token,
+                    "platform": platform,
+                    "token_type": token_type,
+                    "client_type": client_type,
+                    "payload_format": payload_format,
+                    "bundle_id": bundle_id,
+                    "environment": environment,
+                    "device_id": device_id,
+                    "enabled": enabled,
+                }
+            ]
+        )
+
+    def upsert_notification_devices(self, devices: List[Dict[str, Any]]) -> None:
+        """Insert or update many device registrations in one commit.
+
+        Each dict takes the keyword arguments of upsert_notification_device;
+        omitted optional fields get the same defaults.
+        """
+        if not devices:
+            return
+
         now = datetime.now().isoformat()
-        with self._get_connection() as conn:
-            conn.execute(
+        with self._write_tx() as conn:
+            conn.executemany(
                 """
                 INSERT INTO notification_devices
                 (api_key_hash, device_token, platform, token_type, client_type,
@@ -1989,22 +2775,24 @@ class JobDataCache:
                     enabled=excluded.enabled,
                     last_seen=excluded.last_seen
             """,
-                (
-                    api_key_hash,
-                    device_token,
-                    platform,
-                    token_type,
-                    client_type,
-                    payload_format,
-                    bundle_id,
-                    environment,
-                    device_id,
-                    1 if enabled else 0,
-                    now,
-                    now,
-                ),
+                [
+                    (
+                        device["api_key_hash"],
+                        device["device_token"],
+                        device["platform"],
+                        device.get("token_type", "apns"),
+                        device.get("client_type", "native"),
+                        device.get("payload_format", "apns"),
+                        device.get("bundle_id"),
+                        device.get("environment"),
+                        device.get("device_id"),
+                        1 if device.get("enabled", True) else 0,
+                        now,
+                        now,
+                    )
+                    for device in devices
+                ],
             )
-            conn.commit()
 
     def remove_notification_device(
         self, *, api_key_hash: str, device_token: str
@@ -2032,7 +2820,25 @@ class JobDataCache:
         enabled_only: bool = True,
     ) -> List[Dict[str, Any]]:
         """List notification devices for dispatch."""
-        query = "SELECT * FROM notification_devices WHERE 1=1"
+        return list(
+            self.iter_notification_devices(
+                platform=platform,
+                environment=environment,
+                bundle_id=bundle_id,
+                enabled_only=enabled_only,
+            )
+        )
+
+    def iter_notification_devices(
+        self,
+        *,
+        platform: Optional[str] = None,
+        environment: Optional[str] = None,
+        bundle_id: Optional[str] = None,
+        enabled_only: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield notification devices page by page; see _iter_keyset_pages."""
+        query = f"SELECT {_NOTIFICATION_DEVICE_COLUMNS}, id FROM notification_devices WHERE 1=1"
         params: List[Any] = []
 
         if platform:
@@ -2047,28 +2853,29 @@ class JobDataCache:
         if enabled_only:
             query += " AND enabled = 1"
 
-        devices: List[Dict[str, Any]] = []
-        with self._get_connection() as conn:
-            cursor = conn.execute(query, params)
-            for row in cursor.fetchall():
-                devices.append(
-                    {
-                        "api_key_hash": row["api_key_hash"],
-                        "device_token": row["device_token"],
-                        "platform": row["platform"],
-                        "token_type": row["token_type"],
-                        "client_type": row["client_type"],
-                        "payload_format": row["payload_format"],
-                        "bundle_id": row["bundle_id"],
-                        "environment": row["environment"],
-                        "device_id": row["device_id"],
-                        "enabled": bool(row["enabled"]),
-                        "created_at": row["created_at"],
-                        "last_seen": row["last_seen"],
-                    }
-                )
+        for row in self._iter_keyset_pages(query, params):
+            device = dict(zip(_NOTIFICATION_DEVICE_COLUMN_NAMES, row))
+            device["enabled"] = bool(device["enabled"])
+            yield device
 
-        return devices
+    def _iter_keyset_pages(self, query: str, params: List[Any]) -> Iterator[tuple]:
+        """Yield the rows of ``query`` in pages keyed on its last column, id.
+
+        ``query`` must end in a WHERE clause; each page resumes after the last
+        id seen with its own short read, so no transaction stays open while
+        the caller works through a page (e.g. awaiting notification sends).
+        """
+        query += " AND id > ? ORDER BY id LIMIT ?"
+        last_id = 0
+        while True:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    query, (*params, last_id, _FETCH_BATCH_SIZE)
+                ).fetchall()
+            yield from rows
+            if len(rows) < _FETCH_BATCH_SIZE:
+                return
+            last_id = rows[-1][-1]
 
     def record_notification_job_state(
         self, *, job_info: JobInfo
@@ -2332,9 +3139,30 @@ class JobDataCache:
         enabled: bool = True,
     ) -> None:
         """Insert or update a Web Push subscription."""
+        self.upsert_webpush_subscriptions(
+            [
+                {
+                    "api_key_hash": api_key_hash,
+                    "endpoint": endpoint,
+                    "p256dh": p256dh,
+                    "auth": auth,
+                    "user_agent": user_agent,
+                    "enabled": enabled,
+                }
+            ]
+        )
+
+    def upsert_webpush_subscriptions(self, subscriptions: List[Dict[str, Any]]) -> None:
+        """Insert or update many Web Push subscriptions in one commit.
+
+        Each dict takes the keyword arguments of upsert_webpush_subscription.
+        """
+        if not subscriptions:
+            return
+
         now = datetime.now().isoformat()
-        with self._get_connection() as conn:
-            conn.execute(
+        with self._write_tx() as conn:
+            conn.executemany(
                 """
                 INSERT INTO webpush_subscriptions
                 (api_key_hash, endpoint, p256dh, auth, user_agent, enabled, created_at, last_seen)
@@ -2346,18 +3174,20 @@ class JobDataCache:
                     enabled=excluded.enabled,
                     last_seen=excluded.last_seen
             """,
-                (
-                    api_key_hash,
-                    endpoint,
-                    p256dh,
-                    auth,
-                    user_agent,
-                    1 if enabled else 0,
-                    now,
-                    now,
-                ),
+                [
+                    (
+                        subscription["api_key_hash"],
+                        subscription["endpoint"],
+                        subscription["p256dh"],
+                        subscription["auth"],
+                        subscription.get("user_agent"),
+                        1 if subscription.get("enabled", True) else 0,
+                        now,
+                        now,
+                    )
+                    for subscription in subscriptions
+                ],
             )
-            conn.commit()
 
     def remove_webpush_subscription(self, *, api_key_hash: str, endpoint: str) -> int:
         """Remove a Web Push subscription."""
@@ -2381,7 +3211,20 @@ class JobDataCache:
         enabled_only: bool = True,
     ) -> List[Dict[str, Any]]:
         """List Web Push subscriptions."""
-        query = "SELECT * FROM webpush_subscriptions WHERE 1=1"
+        return list(
+            self.iter_webpush_subscriptions(
+                api_key_hash=api_key_hash, enabled_only=enabled_only
+            )
+        )
+
+    def iter_webpush_subscriptions(
+        self,
+        *,
+        api_key_hash: Optional[str] = None,
+        enabled_only: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield Web Push subscriptions page by page; see _iter_keyset_pages."""
+        query = f"SELECT {_WEBPUSH_SUBSCRIPTION_COLUMNS}, id FROM webpush_subscriptions WHERE 1=1"
         params: List[Any] = []
 
         if api_key_hash:
@@ -2390,24 +3233,10 @@ class JobDataCache:
         if enabled_only:
             query += " AND enabled = 1"
 
-        subscriptions: List[Dict[str, Any]] = []
-        with self._get_connection() as conn:
-            cursor = conn.execute(query, params)
-            for row in cursor.fetchall():
-                subscriptions.append(
-                    {
-                        "api_key_hash": row["api_key_hash"],
-                        "endpoint": row["endpoint"],
-                        "p256dh": row["p256dh"],
-                        "auth": row["auth"],
-                        "user_agent": row["user_agent"],
-                        "enabled": bool(row["enabled"]),
-                        "created_at": row["created_at"],
-                        "last_seen": row["last_seen"],
-                    }
-                )
-
-        return subscriptions
+        for row in self._iter_keyset_pages(query, params):
+            subscription = dict(zip(_WEBPUSH_SUBSCRIPTION_COLUMN_NAMES, row))
+            subscription["enabled"] = bool(subscription["enabled"])
+            yield subscription
 
     def verify_cached_jobs(
         self, current_job_ids: Dict[str, List[str]]
@@ -2421,24 +3250,47 @@ class JobDataCache:
         Returns:
             List of (job_id, hostname) tuples for jobs that should be marked completed
         """
-        to_mark_completed = []
-
         with self._get_connection() as conn:
-            cursor = conn.execute(
-                "SELECT job_id, hostname FROM cached_jobs WHERE is_active = 1"
+            # Per-connection scratch tables holding the Slurm snapshot. Hosts
+            # are tracked separately so a host reporting no jobs still counts.
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS verify_hosts "
+                "(hostname TEXT PRIMARY KEY) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS verify_jobs "
+                "(job_id TEXT, hostname TEXT, PRIMARY KEY (job_id, hostname)) "
+                "WITHOUT ROWID"
+            )
+            conn.execute("DELETE FROM verify_hosts")
+            conn.execute("DELETE FROM verify_jobs")
+            conn.executemany(
+                "INSERT INTO verify_hosts VALUES (?)",
+                ((hostname,) for hostname in current_job_ids),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO verify_jobs VALUES (?, ?)",
+                (
+                    (job_id, hostname)
+                    for hostname, job_ids in current_job_ids.items()
+                    for job_id in job_ids
+                ),
             )
-            active_cached_jobs = [
-                (row["job_id"], row["hostname"]) for row in cursor.fetchall()
-            ]
 
-        for job_id, hostname in active_cached_jobs:
             # Only verify hosts included in the current snapshot.
             # This prevents partial host queries from completing jobs on other hosts.
-            if hostname not in current_job_ids:
-                continue
-            current_ids_for_host = current_job_ids.get(hostname, [])
-            if job_id not in current_ids_for_host:
-                to_mark_completed.append((job_id, hostname))
+            cursor = conn.execute("""
+                SELECT c.job_id, c.hostname
+                FROM cached_jobs c
+                JOIN verify_hosts h ON h.hostname = c.hostname
+                LEFT JOIN verify_jobs v
+                    ON v.job_id = c.job_id AND v.hostname = c.hostname
+                WHERE c.is_active = 1 AND v.job_id IS NULL
+            """)
+            to_mark_completed = [(row[0], row[1]) for row in cursor.fetchall()]
+
+            conn.execute("DELETE FROM verify_hosts")
+            conn.execute("DELETE FROM verify_jobs")
 
         return to_mark_completed
 
@@ -2447,8 +3299,6 @@ class JobDataCache:
 
         Returns list of (job_id, hostname, current_state) tuples.
         """
-        from datetime import timezone
-
         cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
         zombies = []
 
@@ -2456,13 +3306,10 @@ class JobDataCache:
             # Find active jobs that have been stuck in PD/UNKNOWN for too long
             cursor = conn.execute(
                 """
-                SELECT job_id, hostname, 
-                       json_extract(job_info_json, '$.state') as state,
-                       json_extract(job_info_json, '$.submit_time') as submit_time,
-                       json_extract(job_info_json, '$.runtime') as runtime
-                FROM cached_jobs 
+                SELECT job_id, hostname, state, runtime
+                FROM cached_jobs
                 WHERE is_active = 1
-                  AND (state = 'PD' OR state = 'UNKNOWN')
+                  AND state IN ('PD', 'UNKNOWN')
                   AND cached_at < ?
                 """,
                 (cutoff.isoformat(),),
@@ -2521,16 +3368,24 @@ class JobDataCache:
         Returns:
             Number of jobs deleted
         """
-        deleted_count = 0
-
-        with self._get_connection() as conn:
+        if keep_user and not hostname:
+            # The same user is kept everywhere, so one statement covers all hosts
+            with self._write_tx() as conn:
+                deleted_count = conn.execute(
+                    "DELETE FROM cached_jobs WHERE user != ? OR user IS NULL",
+                    (keep_user,),
+                ).rowcount
+        else:
+            # Resolve the user for every host before taking the write lock,
+            # since auto-detection goes over SSH
             if hostname:
                 hostnames = [hostname]
             else:
-                # Get all unique hostnames
-                cursor = conn.execute("SELECT DISTINCT hostname FROM cached_jobs")
-                hostnames = [row["hostname"] for row in cursor.fetchall()]
+                with self._get_connection() as conn:
+                    cursor = conn.execute("SELECT DISTINCT hostname FROM cached_jobs")
+                    hostnames = [row["hostname"] for row in cursor.fetchall()]
 
+            users_to_keep: List[Tuple[str, str]] = []
             for host in hostnames:
                 user_to_keep = keep_user
 
@@ -2555,13 +3410,17 @@ class JobDataCache:
                         continue
 
                 if user_to_keep:
+                    users_to_keep.append((host, user_to_keep))
+
+            deleted_count = 0
+            with self._write_tx() as conn:
+                for host, user_to_keep in users_to_keep:
                     # Delete all jobs on this host that don't belong to the user
                     cursor = conn.execute(
                         """
                         DELETE FROM cached_jobs
                         WHERE hostname = ?
-                          AND (json_extract(job_info_json, '$.user') != ?
-                               OR json_extract(job_info_json, '$.user') IS NULL)
+                          AND (user != ? OR user IS NULL)
                     """,
                         (host, user_to_keep),
                     )
@@ -2575,8 +3434,6 @@ class JobDataCache:
                             f"(keeping only user: {user_to_keep})"
                         )
 
-            conn.commit()
-
         if deleted_count > 0:
             logger.info(
                 f"Cache cleanup complete: removed {deleted_count} jobs from other users"
@@ -2610,19 +3467,31 @@ class JobDataCache:
 
         deleted_count = 0
         with self._get_connection() as conn:
-            cursor = conn.execute("""
-                DELETE FROM cached_jobs 
-                WHERE (script_content IS NULL OR script_content = "")
-                  AND job_id IN (
-                    SELECT job_id FROM cached_jobs 
-                    WHERE (script_content IS NULL OR script_content = "")
-                    ORDER BY cached_at ASC 
-                    LIMIT 100
-                  )
-            """)
-            deleted_count = cursor.rowcount
-            conn.commit()
-        current_size_mb = self.db_path.stat().st_size / (1024 * 1024)
+            # Freed pages only leave the file at the next vacuum/checkpoint,
+            # so progress is measured on the pages still holding data.
+            # Each batch commits on its own to keep the write lock short.
+            for _ in range(_SIZE_CLEANUP_MAX_BATCHES):
+                if self._used_size_mb(conn) <= max_size_mb:
+                    break
+                with self._write_tx():
+                    cursor = conn.execute(
+                        """
+                        DELETE FROM cached_jobs
+                        WHERE rowid IN (
+                            SELECT rowid FROM cached_jobs
+                            WHERE (script_content IS NULL OR script_content = '')
+                            ORDER BY cached_at ASC
+                            LIMIT ?
+                        )
+                    """,
+                        (_SIZE_CLEANUP_BATCH_SIZE,),
+                    )
+                if cursor.rowcount <= 0:
+                    break
+                deleted_count += cursor.rowcount
+            # Also hands back pages freed by earlier deletes
+            self._incremental_vacuum(conn)
+            current_size_mb = self._used_size_mb(conn)
         if current_size_mb > max_size_mb:
             logger.warning(
                 "Still over size limit after cleanup, consider increasing limit or manual cleanup"
@@ -2643,28 +3512,45 @@ class JobDataCache:
         Returns:
             Number of jobs exported
         """
-        import json
-
         with self._get_connection() as conn:
             if job_ids:
-                placeholders = ",".join("?" * len(job_ids))
-                query = f"SELECT * FROM cached_jobs WHERE job_id IN ({placeholders})"
-                cursor = conn.execute(query, job_ids)
+                # Stage the IDs in a scratch table so the statement text stays
+                # the same (and cached) whatever the number of IDs
+                conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS export_ids "
+                    "(job_id TEXT PRIMARY KEY) WITHOUT ROWID"
+                )
+                conn.execute("DELETE FROM export_ids")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO export_ids VALUES (?)",
+                    ((job_id,) for job_id in job_ids),
+                )
+                cursor = conn.execute(
+                    "SELECT c.* FROM export_ids e "
+                    "JOIN cached_jobs c ON c.job_id = e.job_id"
+                )
             else:
                 cursor = conn.execute(
                     "SELECT * FROM cached_jobs ORDER BY cached_at DESC"
                 )
 
-            export_data = []
-            for row in cursor.fetchall():
-                row_dict = dict(row)
-                export_data.append(row_dict)
+            # Write the JSON array a batch at a time so memory stays flat
+            count = 0
+            with open(output_file, "wb") as f:
+                f.write(b"[")
+                while batch := cursor.fetchmany(_FETCH_BATCH_SIZE):
+                    if count:
+                        f.write(b",")
+                    f.write(b"\n")
+                    f.write(b",\n".join(_dump_export_row(dict(row)) for row in batch))
+                    count += len(batch)
+                f.write(b"\n]" if count else b"]")
 
-            with open(output_file, "w") as f:
-                json.dump(export_data, f, indent=2, default=str)
+            if job_ids:
+                conn.execute("DELETE FROM export_ids")
 
-            logger.info(f"Exported {len(export_data)} jobs to {output_file}")
-            return len(export_data)
+            logger.info(f"Exported {count} jobs to {output_file}")
+            return count
 
     def get_host_fetch_state(self, hostname: str) -> Optional[Dict[str, Any]]:
         """Get the last fetch state for a host.
@@ -2711,36 +3597,33 @@ class JobDataCache:
             fetch_time_utc: The fetch time in UTC for consistency
             cluster_timezone: The cluster's timezone (e.g., 'America/New_York')
         """
-        with self._get_connection() as conn:
-            # Get existing fetch count
-            cursor = conn.execute(
-                "SELECT fetch_count FROM host_fetch_state WHERE hostname = ?",
-                (hostname,),
-            )
-            row = cursor.fetchone()
-            fetch_count = (row["fetch_count"] + 1) if row else 1
-
+        with self._write_tx() as conn:
+            # fetch_count is bumped in place, so concurrent updates can't lose one
             conn.execute(
                 """
-                INSERT OR REPLACE INTO host_fetch_state
-                (hostname, last_fetch_time, last_fetch_time_utc, 
+                INSERT INTO host_fetch_state
+                (hostname, last_fetch_time, last_fetch_time_utc,
                  cluster_timezone, fetch_count, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT(hostname) DO UPDATE SET
+                    last_fetch_time = excluded.last_fetch_time,
+                    last_fetch_time_utc = excluded.last_fetch_time_utc,
+                    cluster_timezone = excluded.cluster_timezone,
+                    fetch_count = COALESCE(fetch_count, 0) + 1,
+                    updated_at = excluded.updated_at
                 """,
                 (
                     hostname,
                     fetch_time.isoformat(),
                     fetch_time_utc.isoformat(),
                     cluster_timezone,
-                    fetch_count,
                     datetime.now().isoformat(),
                 ),
             )
-            conn.commit()
-            logger.debug(
-                f"Updated fetch state for {hostname}: "
-                f"last_fetch={fetch_time_utc.isoformat()} (UTC), count={fetch_count}"
-            )
+        logger.debug(
+            f"Updated fetch state for {hostname}: "
+            f"last_fetch={fetch_time_utc.isoformat()} (UTC)"
+        )
 
     def get_cached_completed_job_ids(
         self, hostname: str, since: Optional[datetime] = None, max_age_days: int = 90
@@ -2759,30 +3642,26 @@ class JobDataCache:
         Returns:
             Set of job IDs that are completed (is_active = 0) in cache and not too old
         """
-        with self._get_connection() as conn:
-            from datetime import timezone
-
-            # Calculate cutoff date for old jobs
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=max_age_days)
-
-            query = """
-                SELECT job_id 
-                FROM cached_jobs 
-                WHERE hostname = ? AND is_active = 0
-                  AND json_extract(job_info_json, '$.submit_time') >= ?
-            """
-            params = [hostname, cutoff_date.isoformat()]
+        # Calculate cutoff date for old jobs
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+        if since:
+            # Also filter by the provided since date (use the more recent of the two)
+            if not since.tzinfo:
+                since = since.replace(tzinfo=timezone.utc)
+            cutoff_date = max(since, cutoff_date)
 
-            if since:
-                # Also filter by the provided since date (use the more recent of the two)
-                effective_since = (
-                    max(since, cutoff_date)
-                    if since.tzinfo
-                    else max(since.replace(tzinfo=timezone.utc), cutoff_date)
-                )
-                params[1] = effective_since.isoformat()
-
-            cursor = conn.execute(query, params)
+        with self._get_connection() as conn:
+            cursor = conn.execute(
+                """
+                SELECT job_id
+                FROM cached_jobs
+                WHERE hostname = ? AND is_active = 0 AND submit_time >= ?
+            """,
+                (
+                    hostname,
+                    cutoff_date.astimezone(timezone.utc).strftime(_SUBMIT_TIME_FORMAT),
+                ),
+            )
             job_ids = {row["job_id"] for row in cursor.fetchall()}
 
             if job_ids:
@@ -2826,13 +3705,11 @@ class JobDataCache:
                 # Convert UTC 'since' time to cluster's local timezone
                 if cluster_timezone and since.tzinfo:
                     try:
-                        import zoneinfo
-
-                        cluster_tz = zoneinfo.ZoneInfo(cluster_timezone)
+                        cluster_tz = _tz(cluster_timezone)
                         since_local = since.astimezone(cluster_tz)
                         # Strip timezone info for comparison with stored times (which have no timezone)
                         since_for_comparison = since_local.replace(tzinfo=None)
-                    except (ImportError, Exception) as e:
+                    except Exception as e:
                         logger.warning(
                             f"Failed to convert timezone for {hostname}: {e}, using UTC time"
                         )
@@ -2843,25 +3720,59 @@ class JobDataCache:
                         since.replace(tzinfo=None) if since.tzinfo else since
                     )
 
-                # Filter by submit time if available in the JSON
-                query += " AND datetime(json_extract(job_info_json, '$.submit_time')) > datetime(?)"
+                # Filter by submit time if available
+                query += " AND submit_time > datetime(?)"
                 params.append(since_for_comparison.isoformat())
 
-            query += " ORDER BY json_extract(job_info_json, '$.submit_time') DESC"
+            query += " ORDER BY submit_time DESC"
 
+            # Decode batches off this thread so JSON parsing overlaps with
+            # SQLite fetching the next batch.
             cursor = conn.execute(query, params)
-            for row in cursor.fetchall():
+            executor = _get_decode_executor()
+            pending = []
+            while True:
+                batch = cursor.fetchmany(_FETCH_BATCH_SIZE)
+                if not batch:
+                    break
+                pending.append(
+                    executor.submit(_decode_job_info_batch, [row[0] for row in batch])
+                )
+
+        for future in pending:
+            for job_dict in future.result():
+                if job_dict is None:
+                    continue
                 try:
-                    job_dict = json.loads(row["job_info_json"])
-                    job_info = self._deserialize_job_info(job_dict)
-                    jobs.append(job_info)
+                    jobs.append(self._deserialize_job_info(job_dict, trusted=True))
                 except Exception as e:
                     logger.warning(f"Failed to parse cached job: {e}")
 
         return jobs
 
     def close(self):
-        """Clean up resources. Does NOT perform cleanup to preserve data."""
+        """Close open connections. Does NOT perform cleanup to preserve data."""
+        with self._connections_lock:
+            timer, self._optimize_timer = self._optimize_timer, None
+            connections = list(self._connections.values())
+            self._connections.clear()
+            # Threads still holding a connection will open a fresh one
+            self._generation += 1
+
+        if timer is not None:
+            timer.cancel()
+
+        for conn in connections:
+            try:
+                # Let SQLite refresh any statistics this connection found stale
+                conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.debug(f"PRAGMA optimize failed on close: {e}")
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.debug(f"Error closing cache connection: {e}")
+
         logger.info("Job cache closed (data preserved)")
 
 
@@ -2873,6 +3784,11 @@ def get_cache() -> JobDataCache:
     """Get or create global cache instance."""
     global _cache_instance
 
+    # Fast path: the instance is only ever assigned once fully constructed
+    cache = _cache_instance
+    if cache is not None:
+        return cache
+
     with _cache_lock:
         if _cache_instance is None:
             from .utils.config import config as app_config
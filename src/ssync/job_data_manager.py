@@ -20,7 +20,7 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Set
 
-from .cache import get_cache
+from .cache import decompress_output, get_cache
 from .models.job import JobInfo, JobState
 from .utils.async_helpers import create_task
 from .utils.logging import setup_logger
@@ -58,22 +58,15 @@ class JobDataManager:
     @staticmethod
     def _decompress_output(compressed_data: bytes, compression: str) -> str:
         """Decompress output data based on compression type."""
-        import gzip
-
         if not compressed_data:
             return None
 
-        if compression == "gzip":
-            try:
-                return gzip.decompress(compressed_data).decode("utf-8")
-            except Exception:
-                return None
-        elif compression == "none":
-            try:
-                return compressed_data.decode("utf-8")
-            except Exception:
-                return None
-        return None
+        if compression not in ("zstd", "gzip", "none"):
+            return None
+        try:
+            return decompress_output(compressed_data, compression).decode("utf-8")
+        except Exception:
+            return None
 
     def _get_cached_output_content(
         self, job_id: str, hostname: str, output_type: str
@@ -719,7 +712,7 @@ class JobDataManager:
             return [cjd.job_info for cjd in cached_job_data.values() if cjd.job_info]
 
         cached_job_data = self.cache.get_cached_jobs(
-            hostname=host_name, limit=limit or 1000
+            hostname=host_name, limit=limit or 1000, include_outputs=False
         )
         return [cjd.job_info for cjd in cached_job_data if cjd.job_info]
 
@@ -1868,6 +1861,7 @@ class JobDataManager:
             hostname=hostname,
             active_only=True,
             limit=limit or 1000,
+            include_outputs=False,
         )
 
         recent_jobs: List[JobInfo] = []
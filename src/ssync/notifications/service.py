@@ -123,36 +123,29 @@ class NotificationService:
             return 0
 
         cache = get_cache()
-        devices = [
-            device
-            for device in cache.list_notification_devices(
-                platform="ios",
-                environment="sandbox"
-                if self.settings.apns_use_sandbox
-                else "production",
-                bundle_id=self.settings.apns_bundle_id,
-                enabled_only=True,
-            )
-            if device.get("token_type", "apns") == "apns"
-        ]
-        expo_devices = [
-            device
-            for device in cache.list_notification_devices(enabled_only=True)
-            if device.get("token_type") == "expo"
-            or device.get("payload_format") == "expo"
-        ]
-        subscriptions = cache.list_webpush_subscriptions(enabled_only=True)
-
+        # Group registrations by API key straight off the paged iterators
         devices_by_key: dict[str, list[dict]] = {}
-        for device in devices:
-            devices_by_key.setdefault(device["api_key_hash"], []).append(device)
+        for device in cache.iter_notification_devices(
+            platform="ios",
+            environment="sandbox" if self.settings.apns_use_sandbox else "production",
+            bundle_id=self.settings.apns_bundle_id,
+            enabled_only=True,
+        ):
+            if device.get("token_type", "apns") == "apns":
+                devices_by_key.setdefault(device["api_key_hash"], []).append(device)
 
         expo_devices_by_key: dict[str, list[dict]] = {}
-        for device in expo_devices:
-            expo_devices_by_key.setdefault(device["api_key_hash"], []).append(device)
+        for device in cache.iter_notification_devices(enabled_only=True):
+            if (
+                device.get("token_type") == "expo"
+                or device.get("payload_format") == "expo"
+            ):
+                expo_devices_by_key.setdefault(device["api_key_hash"], []).append(
+                    device
+                )
 
         subs_by_key: dict[str, list[dict]] = {}
-        for sub in subscriptions:
+        for sub in cache.iter_webpush_subscriptions(enabled_only=True):
             subs_by_key.setdefault(sub["api_key_hash"], []).append(sub)
 
         all_keys = (
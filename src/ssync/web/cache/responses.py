@@ -6,6 +6,7 @@ from dataclasses import replace
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
+from ...cache import decompress_output
 from ...models.job import JobInfo, JobState
 from ...utils.logging import setup_logger
 from ..models import JobInfoWeb, JobOutputResponse, JobStatusResponse
@@ -242,12 +243,8 @@ class CacheResponseService:
         if not compressed_data:
             return None
 
-        import gzip
-
         try:
-            if compression == "gzip":
-                return gzip.decompress(compressed_data).decode("utf-8")
-            return compressed_data.decode("utf-8")
+            return decompress_output(compressed_data, compression).decode("utf-8")
         except Exception as e:
             logger.error(f"Failed to decompress {output_type}: {e}")
             return None
@@ -135,11 +135,11 @@ class CacheScheduler:
                 zombies = await asyncio.to_thread(
                     self.cache_middleware.cache.find_zombie_jobs, zombie_days
                 )
-                for job_id, hostname, state in zombies:
+                if zombies:
                     await asyncio.to_thread(
-                        self.cache_middleware.cache.mark_job_completed, job_id, hostname
+                        self.cache_middleware.cache.mark_jobs_completed,
+                        [(job_id, hostname) for job_id, hostname, _state in zombies],
                     )
-                if zombies:
                     logger.info(
                         f"Zombie cleanup: marked {len(zombies)} stale jobs as completed"
                     )
@@ -68,10 +68,10 @@ class CacheVerificationService:
                 to_mark_completed
             )
 
-            for job_id, hostname in successfully_updated:
-                await asyncio.to_thread(self.cache.mark_job_completed, job_id, hostname)
-
             if successfully_updated:
+                await asyncio.to_thread(
+                    self.cache.mark_jobs_completed, successfully_updated
+                )
                 logger.info(
                     f"Marked {len(successfully_updated)} jobs as completed with final states"
                 )
@@ -334,7 +334,7 @@ async def websocket_all_jobs_handler(
             all_jobs = []
             since_dt = datetime.now() - timedelta(days=1)
             cached_job_data = cache.get_cached_jobs(
-                hostname=None, limit=500, since=since_dt
+                hostname=None, limit=500, since=since_dt, include_outputs=False
             )
 
             if cached_job_data and len(cached_job_data) > 0:
@@ -14,7 +14,7 @@ from typing import Any, Optional
 from fastapi import HTTPException, Request
 from fastapi.responses import StreamingResponse
 
-from ...cache import get_cache
+from ...cache import decompress_output, get_cache
 from ...models.job import JobState
 from ...utils.async_helpers import create_task
 from ...utils.logging import setup_logger
@@ -63,9 +63,7 @@ def decode_cached_output(
         return None
 
     try:
-        if compression == "gzip":
-            return gzip.decompress(compressed_data).decode("utf-8")
-        return compressed_data.decode("utf-8")
+        return decompress_output(compressed_data, compression).decode("utf-8")
     except Exception as exc:
         logger.error(f"Failed to decompress cached {output_type}: {exc}")
         return None
@@ -309,7 +307,9 @@ def encode_cached_output_for_stream(
 ) -> tuple[str, bool]:
     if compression == "gzip":
         return base64.b64encode(compressed_data).decode("utf-8"), True
-    return compressed_data.decode("utf-8", errors="replace"), False
+    # Stream clients only inflate gzip, so other codecs are sent as text
+    content = decompress_output(compressed_data, compression)
+    return content.decode("utf-8", errors="replace"), False
 
 
 async def fetch_and_cache_compressed_output(
@@ -342,11 +342,10 @@ def decode_download_content(
 ) -> tuple[bytes, str, str]:
     if compressed:
         if compression != "gzip":
-            content = gzip.compress(content)
+            content = gzip.compress(decompress_output(content, compression))
         return content, "application/gzip", ".log.gz"
 
-    if compression == "gzip":
-        content = gzip.decompress(content)
+    content = decompress_output(content, compression)
     return content, "text/plain", ".log"
 
 
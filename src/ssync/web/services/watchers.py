@@ -1,11 +1,11 @@
 """Watcher-related orchestration helpers used by web routes."""
 
 import asyncio
-import gzip
 import json
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
+from ...cache import decompress_output
 from ...models.job import JobState
 from ...utils.async_helpers import create_task
 from ...utils.logging import setup_logger
@@ -197,9 +197,7 @@ def decode_cached_output(
         return ""
 
     try:
-        if compression == "gzip":
-            return gzip.decompress(compressed_data).decode("utf-8")
-        return compressed_data.decode("utf-8")
+        return decompress_output(compressed_data, compression).decode("utf-8")
     except Exception as exc:
         logger.warning(f"Failed to decompress cached {output_type}: {exc}")
         return ""
@@ -220,6 +220,8 @@ def _prepare_cached_host_status_response(
     cached_jobs = cache_middleware.cache.get_cached_jobs(
         hostname=hostname,
         active_only=active_only,
+        user=effective_user,
+        include_outputs=False,
     )
     if not cached_jobs:
         return None, False
@@ -1,6 +1,7 @@
 """Unit tests for cache.py - Job data caching system."""
 
 import json
+import os
 from datetime import datetime, timedelta, timezone
 
 import pytest
@@ -73,18 +74,134 @@ class TestCacheInitialization:
         expected_indices = {
             "idx_hostname",
             "idx_cached_at",
-            "idx_is_active",
-            "idx_completed_jobs",
+            "idx_active_updated",
+            "idx_completed_jobs_submit",
             "idx_watchers_job",
             "idx_watchers_state",
             "idx_notification_devices_key",
-            "idx_notification_devices_platform",
-            "idx_webpush_subscriptions_key",
+            "idx_notification_devices_dispatch",
+            "idx_webpush_subscriptions_key_enabled",
             "idx_webpush_subscriptions_enabled",
             "idx_array_jobs_hostname",
         }
 
         assert expected_indices.issubset(indices)
+        assert "idx_is_active" not in indices
+        assert "idx_completed_jobs" not in indices
+        cache.close()
+
+    @pytest.mark.unit
+    def test_active_jobs_query_walks_covering_index(self, tmp_path):
+        """Test that recent active jobs are read in index order without a sort."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        with cache._get_connection() as conn:
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT job_id FROM cached_jobs "
+                    "WHERE is_active = 1 ORDER BY last_updated DESC LIMIT 50"
+                )
+            )
+
+        assert "idx_active_updated" in plan
+        assert "TEMP B-TREE" not in plan
+        cache.close()
+
+    @pytest.mark.unit
+    def test_verify_reads_active_keys_from_partial_index(self, tmp_path):
+        """Test that verification reads active keys without touching rows."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.verify_cached_jobs({"test.host": []})
+
+        with cache._get_connection() as conn:
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT c.job_id, c.hostname "
+                    "FROM cached_jobs c "
+                    "JOIN verify_hosts h ON h.hostname = c.hostname "
+                    "LEFT JOIN verify_jobs v "
+                    "ON v.job_id = c.job_id AND v.hostname = c.hostname "
+                    "WHERE c.is_active = 1 AND v.job_id IS NULL"
+                )
+            )
+
+        assert "COVERING INDEX idx_cached_jobs_active_keys" in plan
+        cache.close()
+
+    @pytest.mark.unit
+    def test_schema_migrates_once_per_version(self, tmp_path, monkeypatch):
+        """Test that schema setup is skipped once user_version is current."""
+        from ssync import cache as cache_module
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        with cache._get_connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        assert version == cache_module._SCHEMA_VERSION
+        cache.close()
+
+        calls = []
+        monkeypatch.setattr(
+            JobDataCache, "_migrate_schema", lambda self, conn: calls.append(conn)
+        )
+        JobDataCache(cache_dir=tmp_path, max_age_days=30).close()
+        assert calls == []
+
+        monkeypatch.setattr(
+            cache_module, "_SCHEMA_VERSION", cache_module._SCHEMA_VERSION + 1
+        )
+        JobDataCache(cache_dir=tmp_path, max_age_days=30).close()
+        assert len(calls) == 1
+
+    @pytest.mark.unit
+    def test_cache_init_backfills_job_columns(self, tmp_path):
+        """Test that an existing database gets the denormalized job columns."""
+        import sqlite3
+
+        conn = sqlite3.connect(tmp_path / "jobs.db")
+        conn.execute(
+            """
+            CREATE TABLE cached_jobs (
+                job_id TEXT, hostname TEXT, job_info_json TEXT NOT NULL,
+                script_content TEXT, cached_at TEXT NOT NULL,
+                last_updated TEXT NOT NULL, is_active BOOLEAN NOT NULL DEFAULT 1,
+                PRIMARY KEY (job_id, hostname)
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO cached_jobs VALUES ('1', 'test.host', ?, NULL, ?, ?, 0)",
+            (
+                json.dumps({"state": "CD", "user": "alice", "partition": "gpu"}),
+                datetime.now().isoformat(),
+                datetime.now().isoformat(),
+            ),
+        )
+        conn.commit()
+        conn.close()
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        with cache._get_connection() as conn:
+            row = conn.execute(
+                "SELECT state, user, partition, submit_time FROM cached_jobs"
+            ).fetchone()
+        assert tuple(row) == ("CD", "alice", "gpu", None)
+        cache.close()
+
+    @pytest.mark.unit
+    def test_connections_use_wal_and_tuned_pragmas(self, tmp_path):
+        """Test that every connection gets WAL and the per-connection PRAGMAs."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        with cache._get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 10000
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+            assert conn.execute("PRAGMA analysis_limit").fetchone()[0] == 400
         cache.close()
 
     @pytest.mark.unit
@@ -155,6 +272,30 @@ class TestBasicJobCaching:
         assert cached.job_info.name == "updated_name"
         cache.close()
 
+    @pytest.mark.unit
+    def test_cache_job_merge_keeps_critical_fields(self, tmp_path, sample_job_info):
+        """Test that updates can't blank critical fields but can clear others."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(sample_job_info)
+
+        updated_job = JobInfo(
+            job_id=sample_job_info.job_id,
+            name=sample_job_info.name,
+            state=JobState.COMPLETED,
+            hostname=sample_job_info.hostname,
+            stdout_file="",
+            partition="",
+        )
+        cache.cache_job(updated_job)
+
+        cached = cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
+        assert cached.job_info.stdout_file == sample_job_info.stdout_file
+        assert cached.job_info.work_dir == sample_job_info.work_dir
+        assert cached.job_info.user == sample_job_info.user
+        assert cached.job_info.partition == ""
+        assert cached.job_info.state == JobState.COMPLETED
+        cache.close()
+
     @pytest.mark.unit
     def test_cache_job_updates_is_active(self, tmp_path, sample_job_info):
         """Test that is_active flag is updated based on job state."""
@@ -187,6 +328,23 @@ class TestBasicJobCaching:
         assert cached.is_active is False
         cache.close()
 
+    @pytest.mark.unit
+    def test_cache_jobs_batch(self, tmp_path, sample_job_info, sample_array_job_info):
+        """Test batch caching writes every job and keeps existing scripts."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(sample_job_info, script_content="#!/bin/bash")
+
+        sample_job_info.state = JobState.COMPLETED
+        cache.cache_jobs([sample_job_info, sample_array_job_info])
+
+        cached = cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
+        assert cached.job_info.state == JobState.COMPLETED
+        assert cached.script_content == "#!/bin/bash"
+        assert cache.get_cached_job("54321_0", "cluster.example.com") is not None
+        metadata = cache.get_array_job_metadata("54321", "cluster.example.com")
+        assert metadata is not None
+        cache.close()
+
     @pytest.mark.unit
     def test_get_cached_jobs_ignores_unknown_job_info_fields(
         self, tmp_path, sample_job_info, caplog
@@ -271,6 +429,72 @@ class TestNotificationDevices:
         assert cache.list_notification_devices(platform="ios") == []
         cache.close()
 
+    @pytest.mark.unit
+    def test_upsert_notification_devices_bulk(self, tmp_path):
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.upsert_notification_device(
+            api_key_hash="hash", device_token="token0", platform="ios"
+        )
+
+        with cache._get_connection() as conn:
+            changes_before = conn.total_changes
+            cache.upsert_notification_devices(
+                [
+                    {
+                        "api_key_hash": "hash",
+                        "device_token": "token0",
+                        "platform": "ios",
+                        "enabled": False,
+                    },
+                    {
+                        "api_key_hash": "hash",
+                        "device_token": "token1",
+                        "platform": "android",
+                        "token_type": "expo",
+                        "payload_format": "expo",
+                    },
+                ]
+            )
+            assert conn.total_changes - changes_before == 2
+            assert not conn.in_transaction
+
+        devices = {
+            d["device_token"]: d
+            for d in cache.list_notification_devices(enabled_only=False)
+        }
+        assert devices["token0"]["enabled"] is False
+        assert devices["token1"]["token_type"] == "expo"
+        assert devices["token1"]["client_type"] == "native"
+        assert devices["token1"]["enabled"] is True
+        cache.upsert_notification_devices([])
+        cache.close()
+
+    @pytest.mark.unit
+    def test_iter_notification_devices_pages_by_id(self, tmp_path, monkeypatch):
+        import ssync.cache as cache_module
+
+        monkeypatch.setattr(cache_module, "_FETCH_BATCH_SIZE", 2)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.upsert_notification_devices(
+            [
+                {
+                    "api_key_hash": "hash",
+                    "device_token": f"token{i}",
+                    "platform": "ios" if i % 2 else "android",
+                    "enabled": i != 3,
+                }
+                for i in range(7)
+            ]
+        )
+
+        devices = cache.iter_notification_devices(platform="ios")
+        assert [d["device_token"] for d in devices] == ["token1", "token5"]
+        assert [d["device_token"] for d in cache.list_notification_devices()] == [
+            f"token{i}" for i in range(7) if i != 3
+        ]
+        assert len(cache.list_notification_devices(enabled_only=False)) == 7
+        cache.close()
+
 
 class TestNotificationPreferences:
     """Tests for notification preferences."""
@@ -345,6 +569,44 @@ class TestWebPushSubscriptions:
         assert cache.list_webpush_subscriptions(api_key_hash="hash") == []
         cache.close()
 
+    @pytest.mark.unit
+    def test_upsert_webpush_subscriptions_bulk(self, tmp_path):
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.upsert_webpush_subscriptions(
+            [
+                {
+                    "api_key_hash": "hash",
+                    "endpoint": f"https://example.com/{i}",
+                    "p256dh": "p256",
+                    "auth": "auth",
+                }
+                for i in range(3)
+            ]
+        )
+        cache.upsert_webpush_subscriptions(
+            [
+                {
+                    "api_key_hash": "hash",
+                    "endpoint": "https://example.com/1",
+                    "p256dh": "new",
+                    "auth": "auth",
+                    "enabled": False,
+                }
+            ]
+        )
+
+        subs = cache.list_webpush_subscriptions(api_key_hash="hash")
+        assert sorted(s["endpoint"] for s in subs) == [
+            "https://example.com/0",
+            "https://example.com/2",
+        ]
+        all_subs = cache.list_webpush_subscriptions(
+            api_key_hash="hash", enabled_only=False
+        )
+        assert len(all_subs) == 3
+        assert {s["p256dh"] for s in all_subs} == {"p256", "new"}
+        cache.close()
+
     @pytest.mark.unit
     def test_cache_job_with_enum_state(self, tmp_path):
         """Test that JobState enum is properly serialized."""
@@ -369,6 +631,20 @@ class TestWebPushSubscriptions:
         assert job_dict["state"] == "R"  # Enum value, not enum object
         cache.close()
 
+    @pytest.mark.unit
+    def test_job_info_json_same_without_orjson(self, monkeypatch, sample_job_info):
+        """Test the stdlib fallback encodes JobInfo like the orjson path."""
+        from ssync import cache as cache_module
+
+        sample_job_info.node_hostnames = ["node1", "node2"]
+        encoded = cache_module._dump_job_info(sample_job_info)
+        monkeypatch.setattr(cache_module, "orjson", None)
+        fallback = cache_module._dump_job_info(sample_job_info)
+
+        assert json.loads(encoded) == json.loads(fallback)
+        assert json.loads(fallback)["state"] == "R"
+        assert json.loads(fallback)["node_hostnames"] == ["node1", "node2"]
+
     @pytest.mark.unit
     def test_cache_job_timestamps(self, tmp_path, sample_job_info):
         """Test that cache timestamps are set correctly."""
@@ -400,6 +676,49 @@ class TestJobRetrieval:
         assert cached.job_id == sample_job_info.job_id
         cache.close()
 
+    @pytest.mark.unit
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_job_info_round_trips_with_either_decoder(
+        self, tmp_path, monkeypatch, sample_job_info, use_orjson
+    ):
+        """Test that cached rows decode the same with and without orjson."""
+        import ssync.cache as cache_module
+
+        if not use_orjson:
+            monkeypatch.setattr(cache_module, "orjson", None)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(sample_job_info)
+
+        cached = cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
+
+        assert cached.job_info == sample_job_info
+        cache.close()
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_decode_job_info_batch_isolates_corrupt_rows(self, monkeypatch, use_orjson):
+        """Test that batch decoding keeps rows aligned around corrupt payloads."""
+        import ssync.cache as cache_module
+
+        if not use_orjson:
+            monkeypatch.setattr(cache_module, "orjson", None)
+        decode = cache_module._decode_job_info_batch
+
+        assert decode(['{"job_id": "1"}', '{"job_id": "2"}']) == [
+            {"job_id": "1"},
+            {"job_id": "2"},
+        ]
+        assert decode(['{"job_id": "1"}', "{not json", '{"job_id": "3"}']) == [
+            {"job_id": "1"},
+            None,
+            {"job_id": "3"},
+        ]
+        # Splits into two values when joined; must not shift the next row
+        assert decode(['{"a": 1}, {"b": 2}', '{"job_id": "2"}']) == [
+            None,
+            {"job_id": "2"},
+        ]
+
     @pytest.mark.unit
     def test_get_cached_job_not_found(self, tmp_path):
         """Test getting non-existent job returns None."""
@@ -464,6 +783,115 @@ class TestJobRetrieval:
         assert "fresh" in cached_map
         cache.close()
 
+    @pytest.mark.unit
+    def test_get_cached_jobs_without_outputs(self, tmp_path, sample_job_info):
+        """Test that listings can skip the output blobs but keep their metadata."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(sample_job_info, script_content="#!/bin/bash")
+        cache.update_job_outputs(
+            sample_job_info.job_id,
+            sample_job_info.hostname,
+            stdout_content="x" * 2000,
+            stderr_content="err",
+        )
+
+        full = cache.get_cached_jobs()[0]
+        slim = cache.get_cached_jobs(include_outputs=False)[0]
+
+        assert full.stdout_compressed is not None
+        assert slim.stdout_compressed is None
+        assert slim.stderr_compressed is None
+        assert slim.stdout_size == full.stdout_size == 2000
+        assert slim.stdout_compression == full.stdout_compression
+        assert slim.job_info == full.job_info
+        assert slim.script_content == "#!/bin/bash"
+        cache.close()
+
+    @pytest.mark.unit
+    def test_get_cached_jobs_since_uses_submit_time_column(self, tmp_path):
+        """Test that the since filter reads the indexed submit_time column."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        now = datetime.now(timezone.utc)
+        for job_id, age in (("recent", timedelta(hours=1)), ("old", timedelta(days=2))):
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name=job_id,
+                    state=JobState.COMPLETED,
+                    hostname="test.host",
+                    submit_time=(now - age).isoformat(),
+                )
+            )
+
+        jobs = cache.get_cached_jobs(
+            hostname="test.host", since=now - timedelta(days=1)
+        )
+        assert [job.job_id for job in jobs] == ["recent"]
+
+        with cache._get_connection() as conn:
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT job_id FROM cached_jobs "
+                    "WHERE hostname = ? AND submit_time > ?",
+                    ("test.host", "2024-01-01 00:00:00"),
+                )
+            )
+        assert "idx_cached_jobs_submit" in plan
+        cache.close()
+
+    @pytest.mark.unit
+    def test_batch_lookups_pad_to_power_of_two(self, tmp_path):
+        """Test that padded lookup chunks still return exactly the requested jobs."""
+        from ssync.cache import _pad_chunk
+
+        assert _pad_chunk(["a"]) == ["a"]
+        assert _pad_chunk(["a", "b", "c"]) == ["a", "b", "c", None]
+        assert len(_pad_chunk(list(range(300)))) == 512
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for i in range(3):
+            cache.cache_job(
+                JobInfo(job_id=str(i), name="job", state=JobState.RUNNING, hostname="h")
+            )
+
+        cached_map = cache.get_cached_jobs_by_ids(["0", "1", "2"], "h")
+        assert set(cached_map) == {"0", "1", "2"}
+        assert set(cache._get_cached_jobs_for_keys([("0", "h"), ("2", "h")])) == {
+            ("0", "h"),
+            ("2", "h"),
+        }
+        cache.close()
+
+    @pytest.mark.unit
+    def test_get_cached_jobs_by_ids_stale_filter_handles_formats(self, tmp_path):
+        """Test the SQL age filter with offsets, naive times and bad values."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        tz = timezone(timedelta(hours=5))
+        submit_times = {
+            "old_offset": (datetime.now(tz) - timedelta(days=31)).isoformat(),
+            "fresh_offset": (datetime.now(tz) - timedelta(days=29)).isoformat(),
+            "fresh_naive": datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+            "unparseable": "Unknown",
+        }
+        for job_id, submit_time in submit_times.items():
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name=job_id,
+                    state=JobState.COMPLETED,
+                    hostname="test.host",
+                    submit_time=submit_time,
+                )
+            )
+
+        cached_map = cache.get_cached_jobs_by_ids(list(submit_times), "test.host")
+
+        assert set(cached_map) == {"fresh_offset", "fresh_naive", "unparseable"}
+        cache.close()
+
     @pytest.mark.unit
     def test_get_cached_jobs_all(self, tmp_path):
         """Test getting all cached jobs."""
@@ -527,6 +955,168 @@ class TestJobRetrieval:
         assert cached_jobs[0].job_id == "1"
         cache.close()
 
+    @pytest.mark.unit
+    def test_get_cached_jobs_user_filter(self, tmp_path):
+        """Test filtering cached jobs by owner via the denormalized column."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        for job_id, user in (("1", "alice"), ("2", "bob"), ("3", None)):
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name=f"job_{job_id}",
+                    state=JobState.RUNNING,
+                    hostname="test.host",
+                    user=user,
+                    submit_time="2024-01-15T10:30:00+02:00",
+                )
+            )
+
+        cached_jobs = cache.get_cached_jobs(hostname="test.host", user="alice")
+
+        assert [c.job_id for c in cached_jobs] == ["1"]
+        with cache._get_connection() as conn:
+            row = conn.execute(
+                "SELECT state, user, submit_time FROM cached_jobs WHERE job_id = '1'"
+            ).fetchone()
+        assert tuple(row) == ("R", "alice", "2024-01-15 08:30:00")
+        cache.close()
+
+    @pytest.mark.unit
+    def test_iter_cached_jobs_streams_rows(self, tmp_path, monkeypatch):
+        """Test iterating cached jobs lazily across fetch batches."""
+        monkeypatch.setattr("ssync.cache._FETCH_BATCH_SIZE", 2)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for i in range(5):
+            cache.cache_job(
+                JobInfo(
+                    job_id=str(i), name=f"job_{i}", state=JobState.RUNNING, hostname="h"
+                )
+            )
+
+        jobs = cache.iter_cached_jobs(hostname="h")
+        first = next(jobs)
+        jobs.close()
+
+        assert first.hostname == "h"
+        assert len(list(cache.iter_cached_jobs(hostname="h"))) == 5
+        cache.close()
+
+    @pytest.mark.unit
+    def test_iter_cached_jobs_holds_no_connection_between_pages(
+        self, tmp_path, monkeypatch
+    ):
+        """Test that a suspended iterator doesn't keep writes from committing."""
+        import sqlite3
+
+        monkeypatch.setattr("ssync.cache._FETCH_BATCH_SIZE", 2)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for i in range(5):
+            cache.cache_job(
+                JobInfo(job_id=str(i), name="job", state=JobState.RUNNING, hostname="h")
+            )
+        # Give the rows one shared last_updated so pages split a tie
+        with cache._get_connection() as conn:
+            conn.execute("UPDATE cached_jobs SET last_updated = '2024-01-01T00:00:00'")
+            conn.commit()
+
+        jobs = cache.iter_cached_jobs(hostname="h")
+        seen = [next(jobs).job_id]
+        assert cache._local.depth == 0
+
+        # A write made while the iterator is suspended is committed at once
+        cache.cache_job(
+            JobInfo(job_id="9", name="job", state=JobState.RUNNING, hostname="h")
+        )
+        other = sqlite3.connect(cache.db_path)
+        assert other.execute(
+            "SELECT COUNT(*) FROM cached_jobs WHERE job_id = '9'"
+        ).fetchone() == (1,)
+        other.close()
+
+        # Rows written after the iterator started sort ahead of its key
+        seen.extend(job.job_id for job in jobs)
+        assert sorted(seen) == ["0", "1", "2", "3", "4"]
+        assert [j.job_id for j in cache.get_cached_jobs(hostname="h", limit=3)] == [
+            "9",
+            *seen[:2],
+        ]
+        cache.close()
+
+    @pytest.mark.unit
+    def test_get_cached_job_memo_invalidated_by_writes(self, tmp_path, monkeypatch):
+        """Test that repeated lookups are memoized until the database changes."""
+        import threading
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        job = JobInfo(job_id="1", name="job", state=JobState.RUNNING, hostname="h")
+        cache.cache_job(job)
+
+        queries = []
+        original = cache._query_cached_job
+        monkeypatch.setattr(
+            cache,
+            "_query_cached_job",
+            lambda *args: queries.append(args) or original(*args),
+        )
+
+        first = cache.get_cached_job("1", "h")
+        first.job_info.state = JobState.FAILED
+        assert cache.get_cached_job("1", "h").job_info.state == JobState.RUNNING
+        assert len(queries) == 1
+
+        # A write from another thread's connection is picked up
+        writer = threading.Thread(
+            target=cache.update_job_outputs,
+            args=("1", "h"),
+            kwargs={"stdout_content": "x"},
+        )
+        writer.start()
+        writer.join()
+        assert cache.get_cached_job("1", "h").stdout_compressed == b"x"
+        assert len(queries) == 2
+
+        # So is a raw write on this thread's own connection
+        with cache._get_connection() as conn:
+            conn.execute("DELETE FROM cached_jobs")
+            conn.commit()
+        assert cache.get_cached_job("1", "h") is None
+        assert len(queries) == 3
+        cache.close()
+
+    @pytest.mark.unit
+    def test_get_cached_job_memo_holds_no_output_blobs(self, tmp_path):
+        """Test that the memo drops output blobs and is cleared by writes."""
+        from ssync.cache import decompress_output
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for i in range(3):
+            cache.cache_job(
+                JobInfo(job_id=str(i), name="job", state=JobState.RUNNING, hostname="h")
+            )
+            cache.update_job_outputs(str(i), "h", stdout_content="out" * 100)
+
+        for i in range(3):
+            cache.get_cached_job(str(i), "h")
+        memo = cache._local.row_memo
+        assert len(memo) == 3
+        assert all(entry[1].stdout_compressed is None for entry in memo.values())
+
+        # A memo hit still returns the outputs
+        cached = cache.get_cached_job("0", "h")
+        assert (
+            decompress_output(cached.stdout_compressed, cached.stdout_compression)
+            == ("out" * 100).encode()
+        )
+
+        # Any write empties the memo instead of leaving stale entries behind
+        cache.cache_job(
+            JobInfo(job_id="9", name="job", state=JobState.RUNNING, hostname="h")
+        )
+        cache.get_cached_job("9", "h")
+        assert [key[0] for key in memo] == ["9"]
+        cache.close()
+
     @pytest.mark.unit
     def test_get_cached_jobs_with_limit(self, tmp_path):
         """Test limiting number of returned jobs."""
@@ -566,6 +1156,8 @@ class TestScriptOperations:
         cached = cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
 
         assert cached.script_content == new_script
+        assert cached.job_info.name == sample_job_info.name
+        assert cached.job_info.state == sample_job_info.state
         cache.close()
 
     @pytest.mark.unit
@@ -600,6 +1192,63 @@ class TestJobStateManagement:
         assert cached.is_active is False
         cache.close()
 
+    @pytest.mark.unit
+    def test_mark_jobs_completed_in_one_transaction(self, tmp_path):
+        """Test that bulk completion updates every pair and commits once."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for i in range(3):
+            cache.cache_job(
+                JobInfo(job_id=str(i), name="job", state=JobState.RUNNING, hostname="h")
+            )
+
+        with cache._get_connection() as conn:
+            changes_before = conn.total_changes
+            cache.mark_jobs_completed([("0", "h"), ("2", "h"), ("missing", "h")])
+            assert conn.total_changes - changes_before == 2
+            assert not conn.in_transaction
+
+        assert cache.get_cached_job("0", "h").is_active is False
+        assert cache.get_cached_job("1", "h").is_active is True
+        assert cache.get_cached_job("2", "h").is_active is False
+        cache.mark_jobs_completed([])
+        cache.close()
+
+    @pytest.mark.unit
+    def test_find_zombie_jobs(self, tmp_path):
+        """Test that only stale, never-started pending jobs are zombies."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        jobs = [
+            ("stuck", JobState.PENDING, None),
+            ("lost", JobState.PENDING, "0:00"),
+            ("started", JobState.PENDING, "00:05:00"),
+            ("running", JobState.RUNNING, None),
+        ]
+        for job_id, state, runtime in jobs:
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name="job",
+                    state=state,
+                    hostname="h",
+                    runtime=runtime,
+                )
+            )
+        cache.cache_job(
+            JobInfo(job_id="fresh", name="job", state=JobState.PENDING, hostname="h")
+        )
+
+        old = (datetime.now(timezone.utc) - timedelta(days=10)).isoformat()
+        with cache._get_connection() as conn:
+            conn.execute(
+                "UPDATE cached_jobs SET cached_at = ? WHERE job_id != 'fresh'", (old,)
+            )
+            conn.commit()
+
+        zombies = cache.find_zombie_jobs(max_age_days=7)
+
+        assert sorted(zombies) == [("lost", "h", "PD"), ("stuck", "h", "PD")]
+        cache.close()
+
     @pytest.mark.unit
     def test_verify_cached_jobs(self, tmp_path):
         """Test verifying cached jobs against current Slurm state."""
@@ -651,6 +1300,28 @@ class TestJobStateManagement:
         assert ("3", "host.b") not in to_complete
         cache.close()
 
+    @pytest.mark.unit
+    def test_verify_cached_jobs_empty_host_snapshot(self, tmp_path):
+        """A host reporting no jobs completes all of its active cached jobs."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        for job_id, hostname in (("1", "host.a"), ("2", "host.a"), ("3", "host.b")):
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name=f"job_{job_id}",
+                    state=JobState.RUNNING,
+                    hostname=hostname,
+                )
+            )
+
+        to_complete = cache.verify_cached_jobs({"host.a": [], "host.b": ["3"]})
+        assert sorted(to_complete) == [("1", "host.a"), ("2", "host.a")]
+
+        # Scratch tables are cleared, so a later call starts from scratch
+        assert cache.verify_cached_jobs({"host.b": []}) == [("3", "host.b")]
+        cache.close()
+
     @pytest.mark.unit
     def test_inactive_active_state_normalized_to_unknown(self, tmp_path):
         """Inactive cache entries should never surface as RUNNING/PENDING."""
@@ -713,6 +1384,119 @@ class TestArrayJobMetadata:
         assert metadata["total_tasks"] == 3
         cache.close()
 
+    @pytest.mark.unit
+    def test_array_state_counts_follow_task_changes(self, tmp_path):
+        """Test that state counts track task inserts, transitions and deletes."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        def task(i, state):
+            return JobInfo(
+                job_id=f"300_{i}",
+                name="array_job",
+                state=state,
+                hostname="test.host",
+                array_job_id="300",
+                array_task_id=str(i),
+            )
+
+        cache.cache_jobs([task(i, JobState.PENDING) for i in range(4)])
+        cache.cache_job(task(0, JobState.RUNNING))
+        cache.cache_job(task(1, JobState.COMPLETED))
+        cache.cache_job(task(1, JobState.COMPLETED))
+
+        metadata = cache.get_array_job_metadata("300", "test.host")
+        assert metadata["state_counts"] == {"PD": 2, "R": 1, "CD": 1}
+        assert metadata["total_tasks"] == 4
+
+        with cache._get_connection() as conn:
+            conn.execute("DELETE FROM cached_jobs WHERE job_id IN ('300_2', '300_3')")
+            conn.commit()
+
+        metadata = cache.get_array_job_metadata("300", "test.host")
+        assert metadata["state_counts"] == {"R": 1, "CD": 1}
+        cache.close()
+
+    @pytest.mark.unit
+    def test_array_task_lookup_skips_template_rows(self, tmp_path):
+        """Test that task queries exclude the template row via the partial index."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        for job_id, task_id in (("200_[2-5]", "[2-5]"), ("200_0", "0"), ("200_1", "1")):
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name="array_job",
+                    state=JobState.PENDING,
+                    hostname="test.host",
+                    array_job_id="200",
+                    array_task_id=task_id,
+                )
+            )
+
+        tasks = cache.get_array_tasks("200", "test.host")
+        assert [task.job_id for task in tasks] == ["200_0", "200_1"]
+        assert cache.get_array_job_metadata("200", "test.host")["total_tasks"] == 2
+
+        with cache._get_connection() as conn:
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT job_id FROM cached_jobs "
+                    "WHERE array_job_id = ? AND hostname = ? "
+                    "AND instr(job_id, '[') = 0",
+                    ("200", "test.host"),
+                )
+            )
+        assert "idx_cached_jobs_array_task_ids" in plan
+        cache.close()
+
+    @pytest.mark.unit
+    def test_cache_jobs_updates_array_metadata_once(self, tmp_path, monkeypatch):
+        """Test that bulk caching refreshes each array's metadata once."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(
+            JobInfo(
+                job_id="100_0",
+                name="array_job",
+                state=JobState.RUNNING,
+                hostname="test.host",
+                array_job_id="100",
+                array_task_id="0",
+            ),
+            script_content="#!/bin/bash",
+        )
+
+        calls = []
+        original = cache._update_array_metadata
+        monkeypatch.setattr(
+            cache,
+            "_update_array_metadata",
+            lambda *args: calls.append(args) or original(*args),
+        )
+        cache.cache_jobs(
+            [
+                JobInfo(
+                    job_id=f"100_{i}",
+                    name="array_job",
+                    state=JobState.COMPLETED,
+                    hostname="test.host",
+                    array_job_id="100",
+                    array_task_id=str(i),
+                )
+                for i in range(5)
+            ]
+        )
+
+        assert len(calls) == 1
+        metadata = cache.get_array_job_metadata("100", "test.host")
+        assert metadata["total_tasks"] == 5
+        assert metadata["state_counts"] == {"CD": 5}
+        assert metadata["script_content"] == "#!/bin/bash"
+        assert cache.get_cached_job("100_0", "test.host").script_content == (
+            "#!/bin/bash"
+        )
+        cache.close()
+
     @pytest.mark.unit
     def test_array_metadata_state_counting(self, tmp_path):
         """Test that array task state statistics are counted correctly."""
@@ -760,6 +1544,90 @@ class TestArrayJobMetadata:
         assert all(t.array_job_id == "100" for t in tasks)
         cache.close()
 
+    @pytest.mark.unit
+    def test_migration_drops_generated_template_column(self, tmp_path):
+        """Test that a schema-9 file with is_array_template is upgraded cleanly."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for job_id in ("100_[2-9]", "100_0", "100_1"):
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name="array_job",
+                    state=JobState.RUNNING,
+                    hostname="test.host",
+                    array_job_id="100",
+                )
+            )
+        # Recreate the schema-9 layout: generated column, index and a trigger
+        # that read it
+        with cache._get_connection() as conn:
+            conn.execute("DROP INDEX idx_cached_jobs_array_task_ids")
+            conn.execute("DROP TRIGGER trg_array_task_stats_delete")
+            conn.execute(
+                "ALTER TABLE cached_jobs ADD COLUMN is_array_template INTEGER "
+                "GENERATED ALWAYS AS (instr(job_id, '[') > 0) VIRTUAL"
+            )
+            conn.execute(
+                "CREATE INDEX idx_cached_jobs_array_task_ids "
+                "ON cached_jobs(array_job_id, hostname, job_id) "
+                "WHERE is_array_template = 0"
+            )
+            conn.execute(
+                "CREATE TRIGGER trg_array_task_stats_delete AFTER DELETE "
+                "ON cached_jobs WHEN OLD.is_array_template = 0 BEGIN SELECT 1; END"
+            )
+            conn.execute("PRAGMA user_version = 9")
+            conn.commit()
+        cache.close()
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        with cache._get_connection() as conn:
+            columns = {
+                row[1] for row in conn.execute("PRAGMA table_xinfo(cached_jobs)")
+            }
+            schema = " ".join(
+                row[0]
+                for row in conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE tbl_name = 'cached_jobs'"
+                )
+                if row[0]
+            )
+        assert "is_array_template" not in columns
+        assert "is_array_template" not in schema
+
+        assert cache.get_array_task_ids("100", "test.host") == ["100_0", "100_1"]
+        assert [t.job_id for t in cache.get_array_tasks("100", "test.host")] == [
+            "100_0",
+            "100_1",
+        ]
+        metadata = cache.get_array_job_metadata("100", "test.host")
+        assert metadata["state_counts"] == {"R": 2}
+        cache.close()
+
+    @pytest.mark.unit
+    def test_get_array_tasks_across_batches(self, tmp_path, monkeypatch):
+        """Test that tasks split over several fetch batches keep their order."""
+        import ssync.cache as cache_module
+
+        monkeypatch.setattr(cache_module, "_FETCH_BATCH_SIZE", 2)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for i in range(5):
+            cache.cache_job(
+                JobInfo(
+                    job_id=f"100_{i}",
+                    name="array_job",
+                    state=JobState.RUNNING,
+                    hostname="test.host",
+                    array_job_id="100",
+                    array_task_id=str(i),
+                )
+            )
+
+        tasks = cache.get_array_tasks("100", "test.host")
+
+        assert [t.job_id for t in tasks] == [f"100_{i}" for i in range(5)]
+        cache.close()
+
     @pytest.mark.unit
     def test_get_array_tasks_with_limit(self, tmp_path):
         """Test limiting retrieved array tasks."""
@@ -782,6 +1650,42 @@ class TestArrayJobMetadata:
         assert len(tasks) == 3
         cache.close()
 
+    @pytest.mark.unit
+    def test_get_array_task_ids_matches_tasks(self, tmp_path):
+        """Test that task IDs come back in get_array_tasks order."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        for task_id in ("2", "0", "1", "[3-9]"):
+            cache.cache_job(
+                JobInfo(
+                    job_id=f"100_{task_id}",
+                    name="array_job",
+                    state=JobState.PENDING,
+                    hostname="test.host",
+                    array_job_id="100",
+                    array_task_id=task_id,
+                )
+            )
+
+        task_ids = cache.get_array_task_ids("100", "test.host")
+        with cache._get_connection() as conn:
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT job_id FROM cached_jobs "
+                    "WHERE array_job_id = ? AND hostname = ? "
+                    "AND instr(job_id, '[') = 0 ORDER BY job_id",
+                    ("100", "test.host"),
+                )
+            )
+        assert "idx_cached_jobs_array_task_ids" in plan
+        assert "TEMP B-TREE" not in plan
+
+        assert task_ids == ["100_0", "100_1", "100_2"]
+        assert task_ids == [t.job_id for t in cache.get_array_tasks("100", "test.host")]
+        assert cache.get_array_task_ids("missing", "test.host") == []
+        cache.close()
+
     @pytest.mark.unit
     def test_array_metadata_preserves_script(self, tmp_path):
         """Test that array metadata preserves script content."""
@@ -831,6 +1735,7 @@ class TestCacheStatistics:
         assert stats["active_jobs"] == 0
         assert stats["completed_jobs"] == 0
         assert stats["jobs_with_scripts"] == 0
+        assert stats["jobs_with_stdout"] == 0
         cache.close()
 
     @pytest.mark.unit
@@ -884,6 +1789,48 @@ class TestCacheStatistics:
         assert stats["jobs_by_hostname"]["host1.com"] == 1
         cache.close()
 
+    @pytest.mark.unit
+    def test_cache_stats_date_ranges(self, tmp_path):
+        """Test range totals cover every live range, not just the top five."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        stats = cache.get_cache_stats()["date_range_cache"]
+        assert stats["active_ranges"] == 0
+        assert stats["total_hits"] == 0
+        assert stats["avg_hits_per_range"] == 0.0
+        assert stats["top_ranges"] == []
+
+        now = datetime.now()
+        hits = [0, 0, 1, 0, 0, 0, 3]
+        with cache._get_connection() as conn:
+            for i, hit_count in enumerate(hits):
+                filters = {"user": f"user{i}"}
+                conn.execute(
+                    "INSERT INTO cached_job_ranges VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        cache._generate_cache_key("test.host", filters),
+                        "test.host",
+                        (now - timedelta(days=7)).isoformat(),
+                        now.isoformat(),
+                        json.dumps(filters),
+                        json.dumps([str(i)]),
+                        now.isoformat(),
+                        (now + timedelta(hours=1)).isoformat(),
+                        hit_count,
+                    ),
+                )
+            conn.commit()
+
+        stats = cache.get_cache_stats()["date_range_cache"]
+
+        assert stats["active_ranges"] == 7
+        assert stats["total_hits"] == 4
+        assert stats["avg_hits_per_range"] == pytest.approx(4 / 7)
+        assert len(stats["top_ranges"]) == 5
+        assert stats["top_ranges"][0]["filters"] == {"user": "user6"}
+        assert stats["top_ranges"][0]["hits"] == 3
+        cache.close()
+
 
 class TestCacheCleanup:
     """Tests for cache cleanup operations."""
@@ -897,48 +1844,197 @@ class TestCacheCleanup:
         old_job = JobInfo(
             job_id="1", name="old", state=JobState.COMPLETED, hostname="test.host"
         )
-        cache.cache_job(old_job, script_content="important script")
+        cache.cache_job(old_job, script_content="important script")
+
+        # Manually set old cached_at time
+        with cache._get_connection() as conn:
+            old_time = (datetime.now() - timedelta(days=10)).isoformat()
+            conn.execute(
+                "UPDATE cached_jobs SET cached_at = ? WHERE job_id = ?",
+                (old_time, "1"),
+            )
+            conn.commit()
+
+        deleted = cache.cleanup_old_entries(max_age_days=1, preserve_scripts=True)
+
+        # Should not delete because it has a script
+        assert deleted == 0
+        assert cache.get_cached_job("1", "test.host") is not None
+        cache.close()
+
+    @pytest.mark.unit
+    def test_cleanup_other_users_jobs(self, tmp_path):
+        """Test that only the kept user's jobs survive on the cleaned host."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for job_id, hostname, user in (
+            ("1", "test.host", "me"),
+            ("2", "test.host", "other"),
+            ("3", "test.host", None),
+            ("4", "other.host", "other"),
+        ):
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name="job",
+                    state=JobState.COMPLETED,
+                    hostname=hostname,
+                    user=user,
+                )
+            )
+
+        deleted = cache.cleanup_other_users_jobs(hostname="test.host", keep_user="me")
+
+        assert deleted == 2
+        assert cache.get_cached_job("1", "test.host") is not None
+        assert cache.get_cached_job("2", "test.host") is None
+        assert cache.get_cached_job("3", "test.host") is None
+        assert cache.get_cached_job("4", "other.host") is not None
+        cache.close()
+
+    @pytest.mark.unit
+    def test_cleanup_other_users_jobs_all_hosts(self, tmp_path):
+        """Test that an explicit user is kept across every host in one pass."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for job_id, hostname, user in (
+            ("1", "a.host", "me"),
+            ("2", "a.host", "other"),
+            ("3", "b.host", "me"),
+            ("4", "b.host", None),
+        ):
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name="job",
+                    state=JobState.COMPLETED,
+                    hostname=hostname,
+                    user=user,
+                )
+            )
+
+        assert cache.cleanup_other_users_jobs(keep_user="me") == 2
+
+        assert cache.get_cached_job("1", "a.host") is not None
+        assert cache.get_cached_job("2", "a.host") is None
+        assert cache.get_cached_job("3", "b.host") is not None
+        assert cache.get_cached_job("4", "b.host") is None
+        cache.close()
+
+    @pytest.mark.unit
+    def test_cleanup_old_entries_deletes_scriptless(self, tmp_path):
+        """Test that cleanup deletes old entries without scripts."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=1)
+
+        # Create old job without script
+        old_job = JobInfo(
+            job_id="1", name="old", state=JobState.COMPLETED, hostname="test.host"
+        )
+        cache.cache_job(old_job)
+
+        # Manually set old cached_at time
+        with cache._get_connection() as conn:
+            old_time = (datetime.now() - timedelta(days=10)).isoformat()
+            conn.execute(
+                "UPDATE cached_jobs SET cached_at = ? WHERE job_id = ?",
+                (old_time, "1"),
+            )
+            conn.commit()
+
+        deleted = cache.cleanup_old_entries(max_age_days=1, preserve_scripts=True)
+
+        assert deleted == 1
+        assert cache.get_cached_job("1", "test.host") is None
+        cache.close()
+
+    @pytest.mark.unit
+    def test_cleanup_reanalyzes_after_growth(self, tmp_path):
+        """Test that cleanup refreshes planner statistics once the table grows."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_jobs(
+            [
+                JobInfo(job_id=str(i), name="job", state=JobState.RUNNING, hostname="h")
+                for i in range(20)
+            ]
+        )
+
+        cache.cleanup_old_entries()
+
+        with cache._get_connection() as conn:
+            analyzed = conn.execute(
+                "SELECT value FROM cache_meta WHERE key = 'analyze_row_count'"
+            ).fetchone()
+            assert analyzed["value"] == "20"
+            assert not cache._analyze_if_stale(conn)
+        cache.close()
+
+    @pytest.mark.unit
+    def test_periodic_optimize_rearms_until_closed(self, tmp_path):
+        """Test that the periodic optimize refreshes stats and stops on close."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        first_timer = cache._optimize_timer
+        assert first_timer is not None and first_timer.daemon
+
+        cache.cache_job(
+            JobInfo(job_id="1", name="job", state=JobState.RUNNING, hostname="h")
+        )
+        cache._periodic_optimize()
 
-        # Manually set old cached_at time
+        assert cache._optimize_timer is not first_timer
         with cache._get_connection() as conn:
-            old_time = (datetime.now() - timedelta(days=10)).isoformat()
-            conn.execute(
-                "UPDATE cached_jobs SET cached_at = ? WHERE job_id = ?",
-                (old_time, "1"),
-            )
-            conn.commit()
+            analyzed = conn.execute(
+                "SELECT value FROM cache_meta WHERE key = 'analyze_row_count'"
+            ).fetchone()
+        assert analyzed["value"] == "1"
 
-        deleted = cache.cleanup_old_entries(max_age_days=1, preserve_scripts=True)
+        cache.close()
+        assert cache._optimize_timer is None
+        cache._periodic_optimize()
+        assert cache._optimize_timer is None
+        first_timer.cancel()
 
-        # Should not delete because it has a script
-        assert deleted == 0
-        assert cache.get_cached_job("1", "test.host") is not None
+    @pytest.mark.unit
+    def test_maintenance_truncates_wal(self, tmp_path):
+        """Test that maintenance checkpoints the WAL back to zero length."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_jobs(
+            [
+                JobInfo(job_id=str(i), name="job", state=JobState.RUNNING, hostname="h")
+                for i in range(50)
+            ]
+        )
+        wal_path = cache.db_path.with_name(cache.db_path.name + "-wal")
+        assert wal_path.stat().st_size > 0
+
+        cache.maintenance()
+
+        assert wal_path.stat().st_size == 0
+        assert len(cache.get_cached_jobs(hostname="h", limit=100)) == 50
         cache.close()
 
     @pytest.mark.unit
-    def test_cleanup_old_entries_deletes_scriptless(self, tmp_path):
-        """Test that cleanup deletes old entries without scripts."""
+    def test_cleanup_vacuums_freed_pages(self, tmp_path):
+        """Test that new databases use incremental vacuum and cleanup reclaims pages."""
         cache = JobDataCache(cache_dir=tmp_path, max_age_days=1)
+        for i in range(20):
+            job = JobInfo(
+                job_id=str(i), name="job", state=JobState.COMPLETED, hostname="h"
+            )
+            cache.cache_job(job, script_content=os.urandom(8192).hex())
 
-        # Create old job without script
-        old_job = JobInfo(
-            job_id="1", name="old", state=JobState.COMPLETED, hostname="test.host"
-        )
-        cache.cache_job(old_job)
-
-        # Manually set old cached_at time
         with cache._get_connection() as conn:
-            old_time = (datetime.now() - timedelta(days=10)).isoformat()
+            assert conn.execute("PRAGMA page_size").fetchone()[0] == 8192
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+            pages_before = conn.execute("PRAGMA page_count").fetchone()[0]
             conn.execute(
-                "UPDATE cached_jobs SET cached_at = ? WHERE job_id = ?",
-                (old_time, "1"),
+                "UPDATE cached_jobs SET cached_at = ?",
+                ((datetime.now() - timedelta(days=10)).isoformat(),),
             )
             conn.commit()
 
-        deleted = cache.cleanup_old_entries(max_age_days=1, preserve_scripts=True)
+        assert cache.cleanup_old_entries(max_age_days=1, force_cleanup=True) == 20
 
-        assert deleted == 1
-        assert cache.get_cached_job("1", "test.host") is None
+        with cache._get_connection() as conn:
+            assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+            assert conn.execute("PRAGMA page_count").fetchone()[0] < pages_before
         cache.close()
 
     @pytest.mark.unit
@@ -1120,6 +2216,27 @@ class TestEdgeCases:
         assert cached.job_info.state == JobState.UNKNOWN
         cache.close()
 
+    @pytest.mark.unit
+    def test_deserialize_job_info_trusted_matches_constructor(self, tmp_path):
+        """Test the trusted fast path builds the same JobInfo as the constructor."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        job_dict = {
+            "job_id": "1",
+            "name": "job",
+            "state": "CD",
+            "hostname": "test.host",
+            "node_hostnames": ["node1"],
+        }
+
+        job = cache._deserialize_job_info(job_dict, trusted=True)
+
+        assert job == cache._deserialize_job_info(job_dict)
+        assert job.state == JobState.COMPLETED
+        assert job.partition is None
+        with pytest.raises(TypeError):
+            cache._deserialize_job_info({"job_id": "2", "state": "CD"}, trusted=True)
+        cache.close()
+
     @pytest.mark.unit
     def test_cache_thread_safety(self, tmp_path, sample_job_info):
         """Test that cache operations are thread-safe."""
@@ -1154,6 +2271,73 @@ class TestEdgeCases:
         assert len(cached_jobs) == 10
         cache.close()
 
+    @pytest.mark.unit
+    def test_connection_reused_per_thread(self, tmp_path, sample_job_info):
+        """Test connections are reused and uncommitted work is rolled back."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        with cache._get_connection() as conn:
+            with cache._get_connection() as nested:
+                assert nested is conn
+            conn.execute(
+                "INSERT INTO cached_jobs "
+                "(job_id, hostname, job_info_json, cached_at, last_updated) "
+                "VALUES ('1', 'test.host', '{}', '', '')"
+            )
+
+        with cache._get_connection() as again:
+            assert again is conn
+            count = again.execute("SELECT COUNT(*) FROM cached_jobs").fetchone()[0]
+        assert count == 0
+
+        cache.close()
+        cache.cache_job(sample_job_info)
+        assert cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
+        cache.close()
+
+    @pytest.mark.unit
+    def test_write_tx_is_immediate_and_atomic(self, tmp_path, sample_job_info):
+        """Test that write transactions hold the write lock and roll back on error."""
+        import sqlite3
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        other = sqlite3.connect(tmp_path / "jobs.db", timeout=0)
+
+        with pytest.raises(RuntimeError):
+            with cache._write_tx() as conn:
+                # The write lock is taken before any statement runs
+                with pytest.raises(sqlite3.OperationalError):
+                    other.execute("BEGIN IMMEDIATE")
+                with cache._write_tx() as nested:
+                    assert nested is conn
+                cache.cache_job(sample_job_info)
+                raise RuntimeError("abort")
+
+        other.close()
+        assert cache.get_cached_job(sample_job_info.job_id) is None
+        cache.close()
+
+    @pytest.mark.unit
+    def test_reads_not_blocked_by_open_write(self, tmp_path, sample_job_info):
+        """Test that other threads keep reading while a write transaction is open."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(sample_job_info)
+
+        with cache._write_tx() as conn:
+            conn.execute("UPDATE cached_jobs SET is_active = 0")
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                reads = [
+                    pool.submit(cache.get_cached_jobs, active_only=True)
+                    for _ in range(4)
+                ]
+                # Readers see the last committed snapshot without waiting
+                assert all(len(read.result(timeout=5)) == 1 for read in reads)
+
+        assert cache.get_cached_jobs(active_only=True) == []
+        cache.close()
+
 
 class TestDateRangeCaching:
     """Tests for date range caching operations."""
@@ -1315,6 +2499,63 @@ class TestDateRangeCaching:
         assert stats["date_range_cache"]["total_hits"] >= 2
         cache.close()
 
+    @pytest.mark.unit
+    @pytest.mark.parametrize("has_returning", [True, False])
+    def test_date_range_cache_hit_counts(self, tmp_path, monkeypatch, has_returning):
+        """Test that hits return the job IDs and bump the hit count once each."""
+        import ssync.cache as cache_module
+
+        monkeypatch.setattr(cache_module, "_SQLITE_HAS_RETURNING", has_returning)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        filters = {"user": "testuser"}
+        cache_key = cache._generate_cache_key("test.host", filters)
+        now = datetime.now()
+        with cache._get_connection() as conn:
+            conn.execute(
+                "INSERT INTO cached_job_ranges VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    cache_key,
+                    "test.host",
+                    (now - timedelta(days=30)).isoformat(),
+                    (now + timedelta(hours=1)).isoformat(),
+                    json.dumps(filters),
+                    json.dumps(["1", "2"]),
+                    now.isoformat(),
+                    (now + timedelta(hours=1)).isoformat(),
+                ),
+            )
+            conn.commit()
+
+        assert cache.check_date_range_cache("test.host", filters, "7d") == ["1", "2"]
+        assert cache.check_date_range_cache("test.host", filters, "7d") == ["1", "2"]
+        assert cache.check_date_range_cache("other.host", filters, "7d") is None
+
+        with cache._get_connection() as conn:
+            row = conn.execute("SELECT hit_count FROM cached_job_ranges").fetchone()
+        assert row["hit_count"] == 2
+        cache.close()
+
+    @pytest.mark.unit
+    def test_date_range_refresh_updates_row_in_place(self, tmp_path):
+        """Test that re-caching a range updates the existing row."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        filters = {"user": "testuser"}
+        cache.cache_date_range_query("test.host", filters, "1d", ["1"])
+        cache.cache_date_range_query("test.host", filters, "1d", ["1", "2"])
+
+        with cache._get_connection() as conn:
+            rows = conn.execute(
+                "SELECT rowid, job_ids_json, hit_count FROM cached_job_ranges"
+            ).fetchall()
+
+        assert len(rows) == 1
+        assert rows[0]["rowid"] == 1
+        assert json.loads(rows[0]["job_ids_json"]) == ["1", "2"]
+        assert rows[0]["hit_count"] == 0
+        cache.close()
+
     @pytest.mark.unit
     def test_cleanup_expired_ranges(self, tmp_path):
         """Test cleanup of expired date range cache entries."""
@@ -1386,7 +2627,7 @@ class TestOutputCompression:
         cached = cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
 
         # Should be compressed
-        assert cached.stdout_compression == "gzip"
+        assert cached.stdout_compression in ("zstd", "gzip")
         assert cached.stdout_size == len(large_output)
         cache.close()
 
@@ -1412,6 +2653,80 @@ class TestOutputCompression:
         assert cached.stdout_compression == "none"
         cache.close()
 
+    @pytest.mark.unit
+    def test_update_job_outputs_accepts_bytes(self, tmp_path, sample_job_info):
+        """Test that raw output bytes are stored without a text round trip."""
+        from ssync.cache import decompress_output
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(sample_job_info)
+
+        stdout = "étape 1 terminée\n".encode() * 200
+        cache.update_job_outputs(
+            sample_job_info.job_id,
+            sample_job_info.hostname,
+            stdout_content=stdout,
+            stderr_content=b"warn\n",
+        )
+
+        cached = cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
+        assert cached.stdout_size == len(stdout)
+        assert (
+            decompress_output(cached.stdout_compressed, cached.stdout_compression)
+            == stdout
+        )
+        assert cached.stderr_compressed == b"warn\n"
+        assert cached.stderr_compression == "none"
+
+        # The same text passed as str records the same byte size
+        cache.update_job_outputs(
+            sample_job_info.job_id,
+            sample_job_info.hostname,
+            stdout_content=stdout.decode(),
+        )
+        cached = cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
+        assert cached.stdout_size == len(stdout)
+        cache.close()
+
+    @pytest.mark.unit
+    def test_update_job_outputs_compressed_payloads(self, tmp_path, sample_job_info):
+        """Test the base64 API stores compressed payloads as-is and packs raw ones."""
+        import base64
+        import gzip
+
+        from ssync.cache import decompress_output
+
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(sample_job_info)
+
+        stdout = b"line\n" * 1000
+        gzipped = gzip.compress(stdout)
+        cache.update_job_outputs_compressed(
+            sample_job_info.job_id,
+            sample_job_info.hostname,
+            stdout_data={
+                "compressed": True,
+                "data": base64.b64encode(gzipped).decode("ascii"),
+                "original_size": len(stdout),
+                "compression": "gzip",
+            },
+            stderr_data={
+                "compressed": False,
+                "data": base64.b64encode(stdout).decode("ascii"),
+                "original_size": len(stdout),
+            },
+        )
+
+        cached = cache.get_cached_job(sample_job_info.job_id, sample_job_info.hostname)
+        assert cached.stdout_compressed == gzipped
+        assert cached.stdout_compression == "gzip"
+        assert cached.stderr_compression != "none"
+        assert (
+            decompress_output(cached.stderr_compressed, cached.stderr_compression)
+            == stdout
+        )
+        cache.close()
+
     @pytest.mark.unit
     def test_check_outputs_fetched_after_completion(self, tmp_path, sample_job_info):
         """Test checking if outputs were fetched after completion."""
@@ -1456,6 +2771,81 @@ class TestOutputCompression:
         assert stderr_fetched is True
         cache.close()
 
+    @pytest.mark.unit
+    def test_status_update_keeps_outputs_and_fetch_flags(self, tmp_path):
+        """Test re-caching a job leaves stored outputs and fetch flags alone."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        job = JobInfo(
+            job_id="1",
+            name="job",
+            state=JobState.COMPLETED,
+            hostname="test.host",
+            submit_time=datetime.now(timezone.utc).isoformat(),
+        )
+        cache.cache_job(job, script_content="#!/bin/bash")
+        cache.update_job_outputs("1", "test.host", stdout_content="out" * 1000)
+        cache.mark_outputs_fetched_after_completion(
+            "1", "test.host", stdout=True, stderr=False
+        )
+
+        cache.cache_job(job)
+
+        cached = cache.get_cached_job("1", "test.host")
+        assert cached.script_content == "#!/bin/bash"
+        assert cached.stdout_compression != "none"
+        assert cached.stdout_size == 3000
+        assert cache.check_outputs_fetched_after_completion("1", "test.host") == (
+            True,
+            False,
+        )
+        cache.close()
+
+    @pytest.mark.unit
+    def test_recycled_job_id_does_not_inherit_outputs(self, tmp_path):
+        """Test a stale row reused by a new job is fully overwritten."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        old_job = JobInfo(
+            job_id="1",
+            name="old",
+            state=JobState.COMPLETED,
+            hostname="test.host",
+            submit_time=(datetime.now(timezone.utc) - timedelta(days=400)).isoformat(),
+        )
+        cache.cache_job(old_job, script_content="old script")
+        cache.update_job_outputs("1", "test.host", stdout_content="old output")
+
+        new_job = JobInfo(
+            job_id="1",
+            name="new",
+            state=JobState.RUNNING,
+            hostname="test.host",
+            submit_time=datetime.now(timezone.utc).isoformat(),
+        )
+        cache.cache_job(new_job)
+
+        cached = cache.get_cached_job("1", "test.host")
+        assert cached.job_info.name == "new"
+        assert cached.script_content is None
+        assert cached.stdout_compressed is None
+        cache.close()
+
+    @pytest.mark.unit
+    def test_compressed_output_falls_back_to_gzip(self, monkeypatch):
+        """Test that outputs use gzip when zstandard is not installed."""
+        import ssync.cache as cache_module
+
+        monkeypatch.setattr(cache_module, "zstandard", None)
+        data = b"step 1 loss=0.5\n" * 200
+
+        compressed, compression = cache_module.compress_output(data)
+
+        assert compression == "gzip"
+        assert len(compressed) < len(data)
+        assert cache_module.decompress_output(compressed, compression) == data
+        assert cache_module.decompress_output(data, "none") == data
+        with pytest.raises(ValueError):
+            cache_module.decompress_output(compressed, "zstd")
+
 
 class TestCacheManagement:
     """Tests for cache management operations."""
@@ -1484,6 +2874,45 @@ class TestCacheManagement:
         assert cached_with_script is not None
         cache.close()
 
+    @pytest.mark.unit
+    def test_cleanup_by_size_evicts_in_batches(self, tmp_path, monkeypatch):
+        """Test that eviction repeats oldest-first batches until nothing fits."""
+        import ssync.cache as cache_module
+
+        monkeypatch.setattr(cache_module, "_SIZE_CLEANUP_BATCH_SIZE", 2)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        # The same job ID on two hosts: only the script-less row may go
+        for hostname in ("a", "b"):
+            cache.cache_job(
+                JobInfo(
+                    job_id="0", name="job", state=JobState.COMPLETED, hostname=hostname
+                ),
+                script_content="echo keep" if hostname == "a" else None,
+            )
+        for i in range(1, 6):
+            cache.cache_job(
+                JobInfo(
+                    job_id=str(i), name="job", state=JobState.COMPLETED, hostname="a"
+                )
+            )
+
+        assert cache.cleanup_by_size(max_size_mb=0) == 6
+        assert cache.get_cached_job("0", "a") is not None
+        assert cache.get_cached_job("0", "b") is None
+
+        with cache._get_connection() as conn:
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT rowid FROM cached_jobs "
+                    "WHERE (script_content IS NULL OR script_content = '') "
+                    "ORDER BY cached_at ASC LIMIT 10"
+                )
+            )
+        assert "idx_cached_jobs_evictable" in plan
+        assert "TEMP B-TREE" not in plan
+        cache.close()
+
     @pytest.mark.unit
     def test_cleanup_by_size_no_cleanup_needed(self, tmp_path):
         """Test that cleanup by size does nothing if under limit."""
@@ -1582,6 +3011,76 @@ class TestCacheManagement:
         assert set(job_ids) == {"1", "3"}
         cache.close()
 
+    @pytest.mark.unit
+    def test_export_cache_data_many_ids(self, tmp_path):
+        """Test exporting more IDs than SQLite allows as bound parameters."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        cache.cache_job(
+            JobInfo(job_id="7", name="job", state=JobState.RUNNING, hostname="a")
+        )
+        cache.cache_job(
+            JobInfo(job_id="7", name="job", state=JobState.RUNNING, hostname="b")
+        )
+
+        job_ids = [str(i) for i in range(40000)] + ["7"]
+        export_file = tmp_path / "export.json"
+
+        assert cache.export_cache_data(export_file, job_ids=job_ids) == 2
+        assert cache.export_cache_data(export_file, job_ids=["missing"]) == 0
+        with open(export_file) as f:
+            assert json.load(f) == []
+        cache.close()
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_export_cache_data_streams_valid_json(
+        self, tmp_path, monkeypatch, use_orjson
+    ):
+        """Test that exports are valid JSON, empty or with output blobs."""
+        import ssync.cache as cache_module
+
+        if not use_orjson:
+            monkeypatch.setattr(cache_module, "orjson", None)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        empty_file = tmp_path / "empty.json"
+        assert cache.export_cache_data(empty_file) == 0
+        with open(empty_file) as f:
+            assert json.load(f) == []
+
+        job = JobInfo(job_id="1", name="job", state=JobState.RUNNING, hostname="h")
+        cache.cache_job(job)
+        cache.update_job_outputs("1", "h", stdout_content="x" * 2000)
+
+        export_file = tmp_path / "export.json"
+        assert cache.export_cache_data(export_file) == 1
+        with open(export_file) as f:
+            data = json.load(f)
+
+        assert data[0]["job_id"] == "1"
+        assert data[0]["stdout_size"] == 2000
+        cache.close()
+
+    @pytest.mark.unit
+    def test_export_cache_data_across_batches(self, tmp_path, monkeypatch):
+        """Test that rows split over several fetch batches form one array."""
+        import ssync.cache as cache_module
+
+        monkeypatch.setattr(cache_module, "_FETCH_BATCH_SIZE", 2)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        for i in range(5):
+            cache.cache_job(
+                JobInfo(job_id=str(i), name="job", state=JobState.RUNNING, hostname="h")
+            )
+
+        export_file = tmp_path / "export.json"
+        assert cache.export_cache_data(export_file) == 5
+        with open(export_file) as f:
+            data = json.load(f)
+
+        assert sorted(entry["job_id"] for entry in data) == ["0", "1", "2", "3", "4"]
+        cache.close()
+
 
 class TestCompletedJobsRetrieval:
     """Tests for retrieving completed jobs efficiently."""
@@ -1645,6 +3144,35 @@ class TestCompletedJobsRetrieval:
         assert completed[0].job_id == "2"
         cache.close()
 
+    @pytest.mark.unit
+    def test_get_cached_completed_jobs_across_batches(self, tmp_path, monkeypatch):
+        """Test completed jobs decoded in batches keep order and skip bad rows."""
+        monkeypatch.setattr("ssync.cache._FETCH_BATCH_SIZE", 2)
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+
+        base = datetime.now(timezone.utc)
+        for i in range(5):
+            cache.cache_job(
+                JobInfo(
+                    job_id=str(i),
+                    name=f"job_{i}",
+                    state=JobState.COMPLETED,
+                    hostname="test.host",
+                    submit_time=(base - timedelta(minutes=i)).isoformat(),
+                )
+            )
+
+        with cache._get_connection() as conn:
+            conn.execute(
+                "UPDATE cached_jobs SET job_info_json = '[]' WHERE job_id = '2'"
+            )
+            conn.commit()
+
+        completed = cache.get_cached_completed_jobs("test.host")
+
+        assert [j.job_id for j in completed] == ["0", "1", "3", "4"]
+        cache.close()
+
     @pytest.mark.unit
     def test_get_cached_completed_job_ids_efficient(self, tmp_path):
         """Test efficient retrieval of completed job IDs."""
@@ -1692,6 +3220,40 @@ class TestCompletedJobsRetrieval:
         assert "1" not in completed_ids
         cache.close()
 
+    @pytest.mark.unit
+    def test_get_cached_completed_job_ids_uses_submit_index(self, tmp_path):
+        """Test that the since filter compares against the submit_time column."""
+        cache = JobDataCache(cache_dir=tmp_path, max_age_days=30)
+        now = datetime.now(timezone.utc)
+        for job_id, days_ago in (("recent", 1), ("older", 5)):
+            cache.cache_job(
+                JobInfo(
+                    job_id=job_id,
+                    name="job",
+                    state=JobState.COMPLETED,
+                    hostname="test.host",
+                    submit_time=(now - timedelta(days=days_ago)).isoformat(),
+                )
+            )
+
+        since = (now - timedelta(days=3)).replace(tzinfo=None)
+        assert cache.get_cached_completed_job_ids("test.host", since=since) == {
+            "recent"
+        }
+        assert cache.get_cached_completed_job_ids("test.host") == {"recent", "older"}
+
+        with cache._get_connection() as conn:
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT job_id FROM cached_jobs "
+                    "WHERE hostname = ? AND is_active = 0 AND submit_time >= ?",
+                    ("test.host", "2024-01-01 00:00:00"),
+                )
+            )
+        assert "idx_completed_jobs_submit" in plan
+        cache.close()
+
 
 class TestAdditionalEdgeCases:
     """Additional edge case tests."""